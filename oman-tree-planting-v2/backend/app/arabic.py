@@ -0,0 +1,56 @@
+"""
+تطبيع النصوص العربية وتقطيعها للبحث
+توحيد أشكال الألف والهمزة والتاء المربوطة، وإزالة التشكيل والتطويل،
+وتجذيع خفيف (إزالة "ال" و"و" والسوابق واللواحق الشائعة)
+"""
+
+import re
+from functools import lru_cache
+
+# التشكيل (الفتحة .. السكون، الألف الخنجرية) والتطويل
+_DIACRITICS = re.compile('[ً-ْٰـ]')
+
+# كلمات الرسالة (حروف وأرقام بأي لغة)
+_WORDS = re.compile(r'\w+')
+
+# توحيد الحروف المتقاربة
+_CHAR_MAP = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ى': 'ي',
+    'ة': 'ه',
+    'ؤ': 'و',
+    'ئ': 'ي'
+})
+
+# السوابق واللواحق بترتيب الأطول أولاً مع أقل طول يبقى للجذع
+_PREFIXES = (('وال', 2), ('بال', 2), ('كال', 2), ('فال', 2), ('لل', 2), ('ال', 2), ('و', 3))
+_SUFFIXES = (('ات', 3), ('ون', 3), ('ين', 3), ('ها', 3), ('ه', 3))
+
+
+def normalize(text):
+    """تطبيع النص: أحرف صغيرة، بدون تشكيل، مع توحيد الألف والياء والتاء المربوطة"""
+    return _DIACRITICS.sub('', text.lower()).translate(_CHAR_MAP)
+
+
+def stem(word):
+    """تجذيع خفيف لكلمة مطبّعة (سابقة واحدة ولاحقة واحدة على الأكثر)"""
+    for prefix, min_stem in _PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) >= min_stem:
+            word = word[len(prefix):]
+            break
+
+    for suffix, min_stem in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= min_stem:
+            word = word[:-len(suffix)]
+            break
+
+    return word
+
+
+@lru_cache(maxsize=4096)
+def tokenize(text):
+    """جذوع كلمات النص كمجموعة (مع تخزين مؤقت للرسائل المتكررة)"""
+    return frozenset(stem(word) for word in _WORDS.findall(normalize(text)))
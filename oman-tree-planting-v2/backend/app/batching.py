@@ -0,0 +1,125 @@
+"""
+مجدول التجميع الدقيق لطلبات التنبؤ
+يجمع طلبات /api/predict المتزامنة خلال نافذة زمنية قصيرة ويقيّمها كمصفوفة واحدة
+"""
+
+import asyncio
+from concurrent.futures import BrokenExecutor
+
+from backend.app import metrics, timing
+from backend.app.executor import ExecutorSaturatedError
+
+# حدود فئات مدرّج أحجام الدفعات
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# أخطاء تخص الدفعة كاملة لا طلباً بعينه (امتلاء الطابور، تعطل المجمّع)
+BATCH_ERRORS = (ExecutorSaturatedError, BrokenExecutor)
+
+
+class PredictionBatcher:
+    """تجميع الطلبات حتى انقضاء النافذة أو بلوغ الحجم الأقصى ثم توزيع النتائج"""
+
+    def __init__(self, run_batch, window_ms=2.0, max_batch_size=64, batch_errors=BATCH_ERRORS):
+        """
+        Args:
+            run_batch: دالة غير متزامنة تستقبل قائمة طلبات وتُرجع النتائج بنفس الترتيب
+            window_ms: أقصى زمن انتظار لتجميع الدفعة (ملي ثانية)
+            max_batch_size: أقصى عدد طلبات في الدفعة الواحدة
+            batch_errors: أنواع الأخطاء التي تصل إلى كل طلبات الدفعة دون إعادة تقييمها فرادى
+        """
+        self.run_batch = run_batch
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.batch_errors = batch_errors
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+        # مدرّج أحجام الدفعات (الحد الأعلى للفئة -> العدد)
+        self.histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self.histogram_overflow = 0
+        self.batches = 0
+        self.items = 0
+        # دفعات فشلت فأُعيد تقييم طلباتها فرادى
+        self.isolated_failures = 0
+
+    async def submit(self, request):
+        """إضافة طلب إلى الدفعة الحالية وانتظار نتيجته"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        # مراحل الدفعة المشتركة تُضاف إلى سجل كل طلب فيها
+        result, stages = await future
+        timing.merge(stages)
+        return result
+
+    def _flush(self):
+        """إرسال الدفعة الحالية للتقييم"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self._record(len(batch))
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        """
+        تقييم الدفعة وتوزيع النتائج على الطلبات المنتظرة
+        إذا فشلت دفعة من عدة طلبات يُعاد تقييم كل طلب وحده،
+        فيصل الخطأ إلى الطلب المسبب فقط لا إلى كل الطلبات المجمّعة معه
+        (عدا أخطاء الدفعة كاملة: إعادة التقييم فرادى تضاعف الحمل على منفّذ ممتلئ)
+        """
+        stages = timing.start()
+        try:
+            results = await self.run_batch([request for request, _ in batch])
+        except Exception as e:
+            if len(batch) > 1 and not isinstance(e, self.batch_errors):
+                self.isolated_failures += 1
+                await asyncio.gather(*(self._run([item]) for item in batch))
+                return
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result((result, stages))
+
+    def _record(self, size):
+        """تسجيل حجم الدفعة في المدرّج"""
+        self.batches += 1
+        self.items += size
+        metrics.PREDICT_BATCH_SIZE.observe(size, 'micro_batcher')
+        for bucket in BATCH_SIZE_BUCKETS:
+            if size <= bucket:
+                self.histogram[bucket] += 1
+                return
+        self.histogram_overflow += 1
+
+    def stats(self):
+        """إحصائيات التجميع ومدرّج أحجام الدفعات"""
+        histogram = {f'<={bucket}': count for bucket, count in self.histogram.items()}
+        histogram[f'>{BATCH_SIZE_BUCKETS[-1]}'] = self.histogram_overflow
+        return {
+            'window_ms': self.window * 1000,
+            'max_batch_size': self.max_batch_size,
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'isolated_failures': self.isolated_failures,
+            'pending': len(self._pending),
+            'batch_size_histogram': histogram
+        }
@@ -0,0 +1,109 @@
+"""
+ذاكرة تخزين مؤقت لنتائج التنبؤ
+LRU محدود الحجم مع مدة صلاحية، ومفاتيح بمعايير مخصصة مُكمّاة لدقة قابلة للضبط
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+# دقة التكميم الافتراضية لكل معيار مخصص (0 لتعطيل التكميم)
+DEFAULT_RESOLUTION = {
+    'rainfall': 1.0,         # مم
+    'temperature_avg': 0.5,  # °م
+    'humidity': 1.0,         # %
+    'pH': 0.1,
+    'organic_matter': 0.1    # %
+}
+
+
+class PredictionCache:
+    """ذاكرة LRU/TTL آمنة للاستخدام من عدة خيوط"""
+
+    def __init__(self, max_size=4096, ttl=600, resolution=None):
+        """
+        Args:
+            max_size: أقصى عدد نتائج محفوظة
+            ttl: مدة صلاحية النتيجة بالثواني
+            resolution: دقة التكميم لكل معيار (تُدمج مع DEFAULT_RESOLUTION)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.resolution = {**DEFAULT_RESOLUTION, **(resolution or {})}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def quantize(self, custom_params):
+        """تقريب المعايير المخصصة إلى شبكة الدقة المحددة (القيم غير المنتهية تبقى كما هي)"""
+        quantized = {}
+        for name, value in custom_params.items():
+            step = self.resolution.get(name)
+            if step and isinstance(value, (int, float)) and math.isfinite(value):
+                value = round(round(value / step) * step, 6)
+            quantized[name] = value
+        return quantized
+
+    def make_key(self, governorate, season, tree_name, custom_params):
+        """مفتاح التخزين من الأسماء الموحّدة والمعايير المُكمّاة (None للقيم غير المنتهية: لا تُخزّن)"""
+        if any(isinstance(value, float) and not math.isfinite(value) for value in custom_params.values()):
+            return None
+        return (governorate, season, tree_name, tuple(sorted(custom_params.items())))
+
+    def get(self, key):
+        """الحصول على نتيجة محفوظة (None عند عدم الوجود أو انتهاء الصلاحية)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """حفظ نتيجة مع إخراج الأقدم استخداماً عند تجاوز الحجم"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """إبطال جميع النتائج (عند إعادة تحميل النموذج أو البيانات)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """عدادات الإصابة والإخفاق"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations
+        }
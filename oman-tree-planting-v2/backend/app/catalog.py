@@ -0,0 +1,113 @@
+"""
+فهرس الأشجار والمحافظات
+فهارس تجزئة بالأسماء العربية والإنجليزية يشاركها نموذج التنبؤ والـ Chatbot
+"""
+
+from backend.app.data import OmanDataset, get_dataset, set_dataset
+
+# تحويل أسماء الفصول من الإنجليزية إلى العربية
+SEASON_MAPPING = {
+    'spring': 'الربيع',
+    'summer': 'الصيف',
+    'autumn': 'الخريف',
+    'winter': 'الشتاء'
+}
+
+
+def normalize_name(name):
+    """تطبيع الاسم للبحث (إزالة المسافات الطرفية وتحويل الإنجليزية لأحرف صغيرة)"""
+    return name.strip().lower()
+
+
+class TreeCatalog:
+    """فهرس الأشجار والمحافظات يُبنى مرة واحدة عند التحميل"""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.trees_db = dataset.trees_db
+        self.climate_db = dataset.climate_db
+
+        # الاسم المطبّع (عربي أو إنجليزي) -> سجل الشجرة
+        self.trees = {}
+        # نوع الشجرة المطبّع -> أرقام الأشجار بترتيب قاعدة البيانات
+        trees_by_type = {}
+        # حقول سجلات الأشجار بترتيب ظهورها
+        self.tree_fields = {}
+        for index, tree in enumerate(dataset.trees):
+            self.trees.setdefault(normalize_name(tree['name']), tree)
+            self.trees.setdefault(normalize_name(tree['name_en']), tree)
+            trees_by_type.setdefault(normalize_name(tree.get('type', '')), []).append(index)
+            self.tree_fields.update(dict.fromkeys(tree))
+        self.trees_by_type = {tree_type: tuple(indices) for tree_type, indices in trees_by_type.items()}
+
+        # الاسم المطبّع (عربي أو إنجليزي) -> (الاسم العربي، بيانات المحافظة)
+        self.governorates = {}
+        # (الاسم العربي، الفصل بالعربية) -> بيانات الموسم بالشكل المتوقع
+        self.seasons = {}
+        for gov_name_ar, gov_data in self.climate_db['governorates'].items():
+            entry = (gov_name_ar, gov_data)
+            self.governorates.setdefault(normalize_name(gov_name_ar), entry)
+            if gov_data.get('name_en'):
+                self.governorates.setdefault(normalize_name(gov_data['name_en']), entry)
+
+            for season_ar in SEASON_MAPPING.values():
+                if season_ar in gov_data:
+                    raw_data = gov_data[season_ar]
+                    self.seasons[(gov_name_ar, season_ar)] = {
+                        'rainfall': raw_data.get('rainfall_mm', 50),
+                        'temperature_avg': raw_data.get('avg_temperature', 25),
+                        'humidity': raw_data.get('humidity', 50),
+                        'soil_type': raw_data.get('soil_type', 'رملية'),
+                        'pH': raw_data.get('soil_ph', 7.5),
+                        'organic_matter': raw_data.get('organic_matter', 2.0)
+                    }
+
+    @classmethod
+    def from_files(cls):
+        """بناء الفهرس من ملفات البيانات"""
+        return cls(OmanDataset.from_files())
+
+    def get_tree(self, name):
+        """الحصول على سجل الشجرة بالاسم العربي أو الإنجليزي (None إذا لم توجد)"""
+        return self.trees.get(normalize_name(name))
+
+    def get_tree_indices(self, tree_type=None):
+        """أرقام الأشجار من نوع معين عبر فهرس الأنواع (جميع الأشجار بدون نوع)"""
+        if tree_type is None:
+            return range(len(self.dataset.trees))
+        return self.trees_by_type.get(normalize_name(tree_type), ())
+
+    def get_governorate(self, name):
+        """الحصول على (الاسم العربي، بيانات المحافظة) أو None"""
+        return self.governorates.get(normalize_name(name))
+
+    def get_season_data(self, governorate, season):
+        """الحصول على نسخة من بيانات الموسم للمحافظة (None إذا لم توجد)"""
+        entry = self.get_governorate(governorate)
+        if not entry:
+            return None
+
+        season_data = self.seasons.get((entry[0], SEASON_MAPPING.get(season, season)))
+        return dict(season_data) if season_data else None
+
+    def get_governorate_names(self):
+        """أسماء المحافظات بالعربية"""
+        return list(self.dataset.governorate_names)
+
+
+_catalog = None
+
+
+def get_catalog():
+    """الفهرس المشترك للعملية (يُبنى عند أول استخدام فوق طبقة البيانات المشتركة)"""
+    global _catalog
+    if _catalog is None:
+        _catalog = TreeCatalog(get_dataset())
+    return _catalog
+
+
+def set_catalog(catalog):
+    """استبدال الفهرس المشترك (وطبقة بياناته) بعد إعادة التحميل"""
+    global _catalog
+    set_dataset(catalog.dataset)
+    _catalog = catalog
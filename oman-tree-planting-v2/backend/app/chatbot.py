@@ -3,29 +3,46 @@ Chatbot ذكي متخصص في الزراعة والأشجار العمانية
 يدعم أكثر من 120 سؤال وجواب مع نصائح موسمية
 """
 
-import json
-from pathlib import Path
+import time
+from collections import defaultdict
 from typing import List, Dict
-import re
+
+from backend.app import config, metrics, timing
+from backend.app.arabic import normalize, tokenize
+from backend.app.catalog import SEASON_MAPPING, get_catalog
+from backend.app.history import ConversationStore
+from backend.app.recommender import TreeRecommender, get_recommender
 
 class OmanTreeChatbot:
-    def __init__(self):
-        self.trees_db = self._load_trees_database()
-        self.climate_db = self._load_climate_database()
+    def __init__(self, catalog=None, history=None):
+        """
+        Args:
+            catalog: فهرس البيانات (الافتراضي: الفهرس المشترك للعملية)
+            history: مخزن سجل المحادثات (يُمرر عند إعادة التحميل للإبقاء على الجلسات)
+        """
+        # الفهرس المشترك مع نموذج التنبؤ (فوق طبقة البيانات المشتركة للقراءة فقط)
+        self.catalog = catalog or get_catalog()
+        self.recommender = TreeRecommender(catalog) if catalog else get_recommender()
         self.qa_database = self._build_qa_database()
-        self.conversation_history = []
-        
-    def _load_trees_database(self):
-        """تحميل قاعدة بيانات الأشجار"""
-        db_path = Path(__file__).parent.parent.parent / 'data' / 'oman_trees_database.json'
-        with open(db_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        self._build_qa_index()
+        # سجل المحادثات لكل جلسة (محدود الحجم)
+        self.history = history or ConversationStore(
+            max_turns=config.CHAT_HISTORY_TURNS,
+            idle_ttl=config.CHAT_SESSION_IDLE_TTL,
+            max_bytes=config.CHAT_HISTORY_MAX_BYTES,
+            spill_path=config.CHAT_HISTORY_SPILL_PATH or None,
+            max_spill_turns=config.CHAT_HISTORY_SPILL_MAX_TURNS
+        )
+        
+    @property
+    def trees_db(self):
+        """قاعدة بيانات الأشجار (من طبقة البيانات المشتركة)"""
+        return self.catalog.trees_db
     
-    def _load_climate_database(self):
-        """تحميل البيانات المناخية"""
-        db_path = Path(__file__).parent.parent.parent / 'data' / 'oman_seasonal_climate_data.json'
-        with open(db_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    @property
+    def climate_db(self):
+        """البيانات المناخية (من طبقة البيانات المشتركة)"""
+        return self.catalog.climate_db
     
     def _build_qa_database(self):
         """بناء قاعدة بيانات الأسئلة والأجوبة"""
@@ -126,6 +143,42 @@ class OmanTreeChatbot:
             'trees': self._build_tree_specific_qa()
         }
     
+    def _build_qa_index(self):
+        """
+        فهرس معكوس للكلمات المفتاحية: كلمة -> أرقام الأسئلة التي تحتويها
+        تُطبّع الكلمات المفتاحية وتُجذّع مرة واحدة عند البناء بدلاً من كل رسالة
+        """
+        # جميع الأسئلة بترتيب البحث الأصلي (الفئات ثم الأسئلة)
+        self.qa_entries = [qa for category in self.qa_database.values() for qa in category]
+        self.qa_keyword_sizes = []
+        self.qa_token_index = defaultdict(list)
+        # الكلمات المفتاحية المطبّعة لمطابقة قيم السياق
+        self.qa_normalized_keywords = []
+        
+        for entry_id, qa in enumerate(self.qa_entries):
+            keyword_words = tokenize(' '.join(qa['keywords']))
+            self.qa_keyword_sizes.append(len(keyword_words))
+            self.qa_normalized_keywords.append(tuple(normalize(kw) for kw in qa['keywords']))
+            for word in keyword_words:
+                self.qa_token_index[word].append(entry_id)
+        
+        # قيمة السياق -> أرقام الأسئلة التي تحتوي كلماتها المفتاحية عليها
+        self._context_matches_cache = {}
+    
+    def _context_matches(self, value: str) -> frozenset:
+        """الأسئلة التي تحتوي إحدى كلماتها المفتاحية على قيمة السياق (مع تخزين مؤقت)"""
+        matches = self._context_matches_cache.get(value)
+        if matches is None:
+            normalized = normalize(value)
+            matches = frozenset(
+                entry_id for entry_id, keywords in enumerate(self.qa_normalized_keywords)
+                if any(normalized in kw for kw in keywords)
+            )
+            if len(self._context_matches_cache) >= 1024:
+                self._context_matches_cache.clear()
+            self._context_matches_cache[value] = matches
+        return matches
+    
     def _build_tree_specific_qa(self):
         """بناء أسئلة وأجوبة خاصة بكل شجرة"""
         tree_qa = []
@@ -149,85 +202,136 @@ class OmanTreeChatbot:
         
         return tree_qa
     
-    def get_response(self, user_message: str, context: dict = None) -> dict:
+    def get_response(self, user_message: str, context: dict = None, session_id: str = None) -> dict:
         """
         الحصول على رد من Chatbot
         
         Args:
             user_message: رسالة المستخدم
             context: سياق إضافي (محافظة، موسم، شجرة)
+            session_id: معرّف الجلسة لحفظ السجل (اختياري، لا يُحفظ شيء بدونه)
         
         Returns:
             dict: الرد، الاقتراحات، الروابط
         """
-        user_message = user_message.strip().lower()
+        answer = self.get_answer(user_message, context, session_id)
+        followups = self.get_followups(user_message, context, matched=answer['confidence'] > 0)
+        
+        return {
+            'answer': answer['answer'],
+            'suggestions': followups['suggestions'],
+            'related_trees': followups['related_trees'],
+            'confidence': answer['confidence']
+        }
+    
+    def get_answer(self, user_message: str, context: dict = None, session_id: str = None) -> dict:
+        """
+        المرحلة الأولى من الرد: الجواب ودرجة الثقة فقط (تُرسل أولاً في البث)
         
-        # حفظ في السجل
-        self.conversation_history.append({
-            'user': user_message,
-            'context': context
-        })
+        Returns:
+            dict: الجواب ودرجة الثقة (0 إذا لم يُفهم السؤال)
+        """
+        user_message = user_message.strip().lower()
         
         # البحث في قاعدة البيانات
+        started = time.perf_counter()
         best_match = self._find_best_match(user_message, context)
+        elapsed = time.perf_counter() - started
+        metrics.CHAT_MATCH_DURATION.observe(elapsed)
+        timing.record('chat_match', elapsed)
         
         if best_match:
-            response = {
+            answer = {
                 'answer': best_match['answer'],
-                'suggestions': self._get_suggestions(user_message, context),
-                'related_trees': self._get_related_trees(user_message),
                 'confidence': best_match.get('confidence', 0.8)
             }
         else:
-            response = {
+            answer = {
                 'answer': 'عذراً، لم أفهم سؤالك بشكل كامل. يمكنك سؤالي عن:\n• أفضل الأشجار للزراعة\n• متى أزرع شجرة معينة\n• كيفية العناية بالأشجار\n• المعلومات المناخية للمحافظات\n• نصائح الري والتسميد',
+                'confidence': 0.0
+            }
+        
+        # حفظ في سجل الجلسة
+        if session_id:
+            self.remember(session_id, user_message, context, answer['answer'])
+        return answer
+    
+    def remember(self, session_id: str, user_message: str, context: dict, answer: str):
+        """
+        حفظ رسالة وردها في سجل الجلسة
+        يُستدعى في العملية الرئيسية: عمال مجمّع العمليات يحملون نسخة منفصلة من السجل
+        """
+        started = time.perf_counter()
+        self.history.append(session_id, user_message.strip().lower(), context, answer)
+        timing.record('chat_history', time.perf_counter() - started)
+    
+    def get_followups(self, user_message: str, context: dict = None, matched: bool = True) -> dict:
+        """
+        المرحلة الثانية من الرد: الاقتراحات والأشجار ذات الصلة
+        
+        Args:
+            matched: هل فُهم السؤال (وإلا تُرجع اقتراحات عامة)
+        """
+        if not matched:
+            return {
                 'suggestions': [
                     'ما هي أفضل الأشجار لمحافظتي؟',
                     'متى أزرع النخيل؟',
                     'كم مرة أسقي الأشجار في الصيف؟',
                     'أريد معلومات عن شجرة اللبان'
                 ],
-                'related_trees': [],
-                'confidence': 0.0
+                'related_trees': []
             }
         
-        self.conversation_history[-1]['bot'] = response
-        return response
+        user_message = user_message.strip().lower()
+        timer = timing.Stage()
+        suggestions = self._get_suggestions(user_message, context)
+        timer.lap('chat_suggestions')
+        related_trees = self._get_related_trees(user_message)
+        timer.lap('chat_related')
+        return {
+            'suggestions': suggestions,
+            'related_trees': related_trees
+        }
     
     def _find_best_match(self, message: str, context: dict = None) -> dict:
-        """البحث عن أفضل تطابق في قاعدة البيانات"""
+        """
+        البحث عن أفضل تطابق في قاعدة البيانات
+        يقيّم فقط الأسئلة التي تشترك مع الرسالة في كلمة واحدة على الأقل (أو تطابق السياق)
+        """
         best_match = None
         best_score = 0
         
-        # البحث في جميع الفئات
-        for category in self.qa_database.values():
-            for qa in category:
-                score = self._calculate_similarity(message, qa['keywords'])
-                
-                # إضافة نقاط للسياق
-                if context:
-                    if context.get('governorate') and any(context['governorate'].lower() in kw for kw in qa['keywords']):
-                        score += 0.2
-                    if context.get('season') and any(context['season'].lower() in kw for kw in qa['keywords']):
-                        score += 0.2
-                
-                if score > best_score:
-                    best_score = score
-                    best_match = {**qa, 'confidence': score}
+        # عدد الكلمات المشتركة لكل سؤال مرشح عبر الفهرس المعكوس
+        common_counts = defaultdict(int)
+        for word in tokenize(message):
+            for entry_id in self.qa_token_index.get(word, ()):
+                common_counts[entry_id] += 1
+        
+        # إضافة نقاط للسياق
+        governorate_matches = season_matches = frozenset()
+        if context:
+            if context.get('governorate'):
+                governorate_matches = self._context_matches(context['governorate'].lower())
+            if context.get('season'):
+                season_matches = self._context_matches(context['season'].lower())
+        
+        # نفس ترتيب البحث الأصلي: عند التساوي يفوز السؤال الأسبق
+        candidates = set(common_counts) | governorate_matches | season_matches
+        for entry_id in sorted(candidates):
+            size = self.qa_keyword_sizes[entry_id]
+            score = common_counts.get(entry_id, 0) / size if size else 0.0
+            if entry_id in governorate_matches:
+                score += 0.2
+            if entry_id in season_matches:
+                score += 0.2
+            
+            if score > best_score:
+                best_score = score
+                best_match = {**self.qa_entries[entry_id], 'confidence': score}
         
         return best_match if best_score > 0.3 else None
     
-    def _calculate_similarity(self, message: str, keywords: List[str]) -> float:
-        """حساب التشابه بين الرسالة والكلمات المفتاحية"""
-        message_words = set(re.findall(r'\w+', message.lower()))
-        keyword_words = set(' '.join(keywords).lower().split())
-        
-        if not keyword_words:
-            return 0.0
-        
-        common = message_words & keyword_words
-        return len(common) / len(keyword_words)
-    
     def _get_suggestions(self, message: str, context: dict = None) -> List[str]:
         """توليد اقتراحات للأسئلة التالية"""
         suggestions = [
@@ -241,23 +345,18 @@ class OmanTreeChatbot:
             suggestions.insert(0, f"ما هي أفضل الأشجار لمحافظة {context['governorate']}؟")
         
         if context and context.get('season'):
-            season_ar = {
-                'spring': 'الربيع',
-                'summer': 'الصيف',
-                'autumn': 'الخريف',
-                'winter': 'الشتاء'
-            }
-            suggestions.insert(0, f"ماذا أزرع في فصل {season_ar.get(context['season'], context['season'])}؟")
+            suggestions.insert(0, f"ماذا أزرع في فصل {SEASON_MAPPING.get(context['season'], context['season'])}؟")
         
         return suggestions[:4]
     
     def _get_related_trees(self, message: str) -> List[Dict]:
         """الحصول على أشجار ذات صلة"""
         related = []
+        message = normalize(message)
         
         # البحث في قاعدة الأشجار
         for tree in self.trees_db['trees'][:5]:
-            if any(keyword in message for keyword in [tree['name'].lower(), tree['name_en'].lower()]):
+            if any(keyword in message for keyword in [normalize(tree['name']), normalize(tree['name_en'])]):
                 related.append({
                     'name': tree['name'],
                     'name_en': tree['name_en'],
@@ -268,109 +367,43 @@ class OmanTreeChatbot:
     
     def get_seasonal_advice(self, governorate: str, season: str) -> str:
         """الحصول على نصائح موسمية لمحافظة معينة"""
-        season_mapping = {
-            'spring': 'الربيع',
-            'summer': 'الصيف',
-            'autumn': 'الخريف',
-            'winter': 'الشتاء'
-        }
-        
-        season_ar = season_mapping.get(season, season)
-        
-        for gov_name_ar, gov_data in self.climate_db['governorates'].items():
-            if gov_name_ar == governorate or gov_data.get('name_en', '').lower() == governorate.lower():
-                if season_ar in gov_data:
-                    season_data = gov_data[season_ar]
-                    
-                    advice = f"🌦️ نصائح {season_ar} في {gov_name_ar}:\n\n"
-                    advice += f"🌡️ درجة الحرارة: {season_data.get('avg_temperature', 25)}°م\n"
-                    advice += f"💧 الأمطار: {season_data.get('rainfall_mm', 50)} مم\n"
-                    advice += f"💨 الرطوبة: {season_data.get('humidity', 50)}%\n"
-                    advice += f"🌱 نوع التربة: {season_data.get('soil_type', 'رملية')}\n\n"
-                    
-                    advice += "📌 توصيات الموسم:\n"
-                    if season_data.get('rainfall_mm', 50) < 50:
-                        advice += "• زد كمية الري - الأمطار قليلة\n"
-                    if season_data.get('avg_temperature', 25) > 35:
-                        advice += "• استخدم شبكات التظليل\n"
-                    if season_data.get('humidity', 50) > 70:
-                        advice += "• راقب الأمراض الفطرية\n"
-                    
-                    return advice
-        
-        return "لم أتمكن من العثور على بيانات لهذه المحافظة."
-    
-    def get_tree_recommendation(self, governorate: str, season: str) -> List[Dict]:
-        """توصية بأشجار مناسبة لمحافظة وموسم"""
-        recommendations = []
-        
-        season_mapping = {
-            'spring': 'الربيع',
-            'summer': 'الصيف',
-            'autumn': 'الخريف',
-            'winter': 'الشتاء'
-        }
+        season_ar = SEASON_MAPPING.get(season, season)
         
-        season_ar = season_mapping.get(season, season)
-        
-        # الحصول على بيانات المناخ
-        climate_data = None
-        for gov_name_ar, gov_data in self.climate_db['governorates'].items():
-            if gov_name_ar == governorate or gov_data.get('name_en', '').lower() == governorate.lower():
-                if season_ar in gov_data:
-                    raw_data = gov_data[season_ar]
-                    climate_data = {
-                        'rainfall': raw_data.get('rainfall_mm', 50),
-                        'temperature_avg': raw_data.get('avg_temperature', 25),
-                        'humidity': raw_data.get('humidity', 50),
-                        'soil_type': raw_data.get('soil_type', 'رملية')
-                    }
-                break
-        
-        if not climate_data:
-            return []
-        
-        # تقييم الأشجار
-        for tree in self.trees_db['trees']:
-            compatibility = self._calculate_tree_compatibility(tree, climate_data)
+        gov_entry = self.catalog.get_governorate(governorate)
+        if gov_entry and season_ar in gov_entry[1]:
+            gov_name_ar, gov_data = gov_entry
+            season_data = gov_data[season_ar]
             
-            if compatibility > 0.6:
-                recommendations.append({
-                    'tree': tree,
-                    'compatibility': compatibility,
-                    'reason': self._get_compatibility_reason(tree, climate_data, compatibility)
-                })
-        
-        # ترتيب حسب التوافق
-        recommendations.sort(key=lambda x: x['compatibility'], reverse=True)
+            advice = f"🌦️ نصائح {season_ar} في {gov_name_ar}:\n\n"
+            advice += f"🌡️ درجة الحرارة: {season_data.get('avg_temperature', 25)}°م\n"
+            advice += f"💧 الأمطار: {season_data.get('rainfall_mm', 50)} مم\n"
+            advice += f"💨 الرطوبة: {season_data.get('humidity', 50)}%\n"
+            advice += f"🌱 نوع التربة: {season_data.get('soil_type', 'رملية')}\n\n"
+            
+            advice += "📌 توصيات الموسم:\n"
+            if season_data.get('rainfall_mm', 50) < 50:
+                advice += "• زد كمية الري - الأمطار قليلة\n"
+            if season_data.get('avg_temperature', 25) > 35:
+                advice += "• استخدم شبكات التظليل\n"
+            if season_data.get('humidity', 50) > 70:
+                advice += "• راقب الأمراض الفطرية\n"
+            
+            return advice
         
-        return recommendations[:5]
+        return "لم أتمكن من العثور على بيانات لهذه المحافظة."
     
-    def _calculate_tree_compatibility(self, tree: Dict, climate: Dict) -> float:
-        """حساب توافق الشجرة مع المناخ"""
-        score = 0.0
-        
-        # الأمطار
-        if tree['requirements']['rainfall_min'] <= climate['rainfall'] <= tree['requirements']['rainfall_max']:
-            score += 0.3
-        elif abs(climate['rainfall'] - tree['requirements']['rainfall_min']) < 50:
-            score += 0.15
-        
-        # درجة الحرارة
-        if tree['requirements']['temperature_min'] <= climate['temperature_avg'] <= tree['requirements']['temperature_max']:
-            score += 0.3
-        elif abs(climate['temperature_avg'] - tree['requirements']['temperature_min']) < 10:
-            score += 0.15
-        
-        # الرطوبة
-        if tree['requirements']['humidity_min'] <= climate['humidity'] <= tree['requirements']['humidity_max']:
-            score += 0.2
-        
-        # نوع التربة
-        if climate['soil_type'].lower() in [s.lower() for s in tree['requirements']['soil_types']]:
-            score += 0.2
-        
-        return min(score, 1.0)
+    def get_tree_recommendation(self, governorate: str, season: str, limit: int = 5) -> List[Dict]:
+        """توصية بأشجار مناسبة لمحافظة وموسم (توافق متجهي لجميع الأشجار ثم أفضل limit)"""
+        return [
+            {
+                'tree': tree,
+                'compatibility': compatibility,
+                'reason': self._get_compatibility_reason(tree, None, compatibility)
+            }
+            for tree, compatibility, _ in self.recommender.recommend(
+                governorate, season, limit, min_score=0.6
+            )
+        ]
     
     def _get_compatibility_reason(self, tree: Dict, climate: Dict, score: float) -> str:
         """الحصول على سبب التوافق"""
@@ -0,0 +1,122 @@
+"""
+ضغط الاستجابات
+تفاوض على الترميز من Accept-Encoding (brotli إن توفرت المكتبة، ثم gzip)،
+مع حد أدنى للحجم، وضغط مسبق للاستجابات الثابتة مرة واحدة عند التحميل
+"""
+
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from backend.app import config
+
+try:
+    import brotli
+except ImportError:  # brotli اختياري: gzip فقط
+    brotli = None
+
+# الترميزات المدعومة بترتيب التفضيل
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# أنواع المحتوى التي تُضغط (البث SSE يُرسل كما هو)
+COMPRESSIBLE_TYPES = ('application/json', 'text/plain', 'text/html')
+
+
+def compress(body, encoding, best=False):
+    """
+    ضغط البايتات بالترميز المحدد
+
+    Args:
+        best: أعلى مستوى ضغط (للاستجابات الثابتة التي تُضغط مرة واحدة)
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if best else config.BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if best else config.GZIP_LEVEL, mtime=0)
+
+
+def precompress(body):
+    """النسخ المضغوطة مسبقاً لجسم ثابت: الترميز -> البايتات (فارغ للأجسام الصغيرة)"""
+    if len(body) < config.COMPRESSION_MIN_SIZE:
+        return {}
+    return {encoding: compress(body, encoding, best=True) for encoding in ENCODINGS}
+
+
+def negotiate(accept_encoding):
+    """
+    اختيار الترميز من ترويسة Accept-Encoding
+
+    Returns:
+        str: 'br' أو 'gzip'، أو None لعدم الضغط
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    best = None
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (encoding, weight)
+    return best[0] if best else None
+
+
+class CompressionMiddleware:
+    """
+    ضغط الاستجابات الديناميكية الكاملة (رسالة واحدة) عند تجاوز الحد الأدنى
+    الاستجابات المضغوطة مسبقاً (Content-Encoding موجود) والبث تمر دون تغيير
+    """
+
+    def __init__(self, app, minimum_size=None):
+        self.app = app
+        self.minimum_size = config.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get('accept-encoding'))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message['type'] == 'http.response.start':
+                # تأجيل الترويسات حتى معرفة حجم الجسم
+                start_message = message
+                return
+
+            if start_message is not None and message['type'] == 'http.response.body':
+                headers = MutableHeaders(raw=start_message['headers'])
+                body = message.get('body', b'')
+                content_type = headers.get('content-type', '')
+                if (not message.get('more_body', False)
+                        and len(body) >= self.minimum_size
+                        and 'content-encoding' not in headers
+                        and content_type.startswith(COMPRESSIBLE_TYPES)):
+                    body = compress(body, encoding)
+                    headers['Content-Encoding'] = encoding
+                    headers['Content-Length'] = str(len(body))
+                    headers.add_vary_header('Accept-Encoding')
+                    message = {**message, 'body': body}
+
+                await send(start_message)
+                start_message = None
+
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,81 @@
+"""
+إعدادات تشغيل الخادم
+تُقرأ من متغيرات البيئة مع قيم افتراضية مناسبة
+"""
+
+import os
+from pathlib import Path
+
+# جذر المشروع (oman-tree-planting-v2)
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def _env_int(name, default):
+    """قراءة عدد صحيح من متغيرات البيئة"""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_float(name, default):
+    """قراءة عدد عشري من متغيرات البيئة"""
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_resolution(name):
+    """قراءة دقة التكميم بصيغة rainfall=1,temperature_avg=0.5"""
+    value = os.environ.get(name, '')
+    resolution = {}
+    for item in value.split(','):
+        if '=' in item:
+            key, step = item.split('=', 1)
+            resolution[key.strip()] = float(step)
+    return resolution
+
+
+# مجلد النماذج المدربة (مسار مطلق لا يعتمد على مجلد التشغيل)
+MODEL_DIR = Path(os.environ.get('OMAN_MODEL_DIR', PROJECT_ROOT / 'models')).resolve()
+
+# تنفيذ الاستدلال خارج حلقة asyncio
+INFERENCE_POOL = os.environ.get('OMAN_INFERENCE_POOL', 'thread')  # thread أو process
+INFERENCE_WORKERS = _env_int('OMAN_INFERENCE_WORKERS', min(4, os.cpu_count() or 1))
+INFERENCE_QUEUE_SIZE = _env_int('OMAN_INFERENCE_QUEUE_SIZE', 64)
+INFERENCE_RETRY_AFTER = _env_int('OMAN_INFERENCE_RETRY_AFTER', 1)
+
+# تجميع طلبات /api/predict المتزامنة في دفعة واحدة
+BATCH_WINDOW_MS = _env_float('OMAN_BATCH_WINDOW_MS', 2.0)
+BATCH_MAX_SIZE = _env_int('OMAN_BATCH_MAX_SIZE', 64)
+
+# محرك الاستدلال: sklearn أو compiled (مصفوفات مسطّحة مع تنقل متجهي)
+INFERENCE_ENGINE = os.environ.get('OMAN_INFERENCE_ENGINE', 'sklearn')
+
+# ذاكرة نتائج التنبؤ بالمعايير المخصصة
+PREDICTION_CACHE_SIZE = _env_int('OMAN_PREDICTION_CACHE_SIZE', 4096)
+PREDICTION_CACHE_TTL = _env_float('OMAN_PREDICTION_CACHE_TTL', 600.0)
+PREDICTION_CACHE_RESOLUTION = _env_resolution('OMAN_PREDICTION_CACHE_RESOLUTION')
+
+# سجل المحادثات لكل جلسة
+CHAT_HISTORY_TURNS = _env_int('OMAN_CHAT_HISTORY_TURNS', 20)
+CHAT_SESSION_IDLE_TTL = _env_float('OMAN_CHAT_SESSION_IDLE_TTL', 1800.0)
+CHAT_HISTORY_MAX_BYTES = _env_int('OMAN_CHAT_HISTORY_MAX_BYTES', 16 * 1024 * 1024)
+CHAT_HISTORY_SPILL_PATH = os.environ.get('OMAN_CHAT_HISTORY_SPILL_PATH', '')
+CHAT_HISTORY_SPILL_MAX_TURNS = _env_int('OMAN_CHAT_HISTORY_SPILL_MAX_TURNS', 100_000)
+
+# مدة تخزين استجابات الكتالوج الثابتة في المتصفح والوسطاء (ثواني)
+CATALOG_MAX_AGE = _env_int('OMAN_CATALOG_MAX_AGE', 300)
+
+# ضغط الاستجابات (gzip، و brotli إن كانت المكتبة مثبتة)
+COMPRESSION_MIN_SIZE = _env_int('OMAN_COMPRESSION_MIN_SIZE', 500)  # بايت، الأصغر يُرسل دون ضغط
+GZIP_LEVEL = _env_int('OMAN_GZIP_LEVEL', 6)  # للاستجابات الديناميكية؛ الثابتة تُضغط بأعلى مستوى مرة واحدة
+BROTLI_QUALITY = _env_int('OMAN_BROTLI_QUALITY', 5)
+
+# توقيت مراحل الطلب في ترويسة Server-Timing (0 للتعطيل)
+SERVER_TIMING = bool(_env_int('OMAN_SERVER_TIMING', 1))
+
+# المُحلّل بأخذ العينات (يُشغّل ويُوقف من /admin/profiler)
+PROFILER_INTERVAL_MS = _env_float('OMAN_PROFILER_INTERVAL_MS', 10.0)
+PROFILER_OUTPUT = Path(os.environ.get('OMAN_PROFILER_OUTPUT', PROJECT_ROOT / 'profile.folded')).resolve()
+
+# إعادة تحميل البيانات والنماذج دون إعادة تشغيل الخادم
+ADMIN_TOKEN = os.environ.get('OMAN_ADMIN_TOKEN', '')  # فارغ = تعطيل /admin/reload
+RELOAD_WATCH_INTERVAL = _env_float('OMAN_RELOAD_WATCH_INTERVAL', 0.0)  # ثواني، 0 = بدون مراقبة الملفات
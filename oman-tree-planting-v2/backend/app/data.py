@@ -0,0 +1,143 @@
+"""
+طبقة البيانات المشتركة
+تحمّل ملفات JSON مرة واحدة لكل عملية في هياكل للقراءة فقط:
+نصوص مُوحّدة (interned)، وقواميس مجمّدة، ومصفوفات NumPy لمتطلبات الأشجار والمناخ
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+DATA_DIR = Path(__file__).parent.parent.parent / 'data'
+
+TREES_FILE = 'oman_trees_database.json'
+CLIMATE_FILE = 'oman_seasonal_climate_data.json'
+
+# الفصول بالترتيب المستخدم في مصفوفات المناخ
+SEASONS_AR = ('الربيع', 'الصيف', 'الخريف', 'الشتاء')
+
+# حقول المتطلبات الرقمية لكل شجرة
+REQUIREMENT_FIELDS = (
+    'rainfall_min', 'rainfall_max',
+    'temperature_min', 'temperature_max',
+    'humidity_min', 'humidity_max',
+    'pH_min', 'pH_max'
+)
+
+# حقول المناخ الرقمية مع القيم الافتراضية (كما في بيانات الموسم)
+CLIMATE_FIELDS = (
+    ('rainfall_mm', 50),
+    ('avg_temperature', 25),
+    ('humidity', 50),
+    ('soil_ph', 7.5),
+    ('organic_matter', 2.0)
+)
+
+
+class FrozenDict(dict):
+    """قاموس للقراءة فقط (يبقى dict لتسلسل JSON ونقله بين العمليات)"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("بيانات المنصة للقراءة فقط")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(value):
+    """تجميد بنية JSON: قواميس مجمّدة، وقوائم كـ tuple، ونصوص مُوحّدة"""
+    if isinstance(value, dict):
+        return FrozenDict((sys.intern(k), freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+def _readonly_array(values, dtype=np.float64):
+    """مصفوفة NumPy غير قابلة للتعديل"""
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+def _load_json(filename):
+    """تحميل ملف JSON من مجلد البيانات"""
+    with open(DATA_DIR / filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class OmanDataset:
+    """بيانات الأشجار والمناخ للقراءة فقط، مشتركة بين جميع مكونات العملية"""
+
+    def __init__(self, trees_db, climate_db):
+        self.trees_db = freeze(trees_db)
+        self.climate_db = freeze(climate_db)
+        self.trees = self.trees_db['trees']
+        self.governorate_names = tuple(self.climate_db['governorates'].keys())
+
+        # متطلبات الأشجار كمصفوفات: الحقل -> مصفوفة (عدد الأشجار)
+        self.requirements = FrozenDict(
+            (field, _readonly_array([tree['requirements'][field] for tree in self.trees]))
+            for field in REQUIREMENT_FIELDS
+        )
+        # أنواع التربة المناسبة لكل شجرة (بأحرف صغيرة)
+        self.soil_types = tuple(
+            frozenset(sys.intern(s.lower()) for s in tree['requirements']['soil_types'])
+            for tree in self.trees
+        )
+        # أنواع التربة كبتات: النوع (بأحرف صغيرة) -> البت، وقناع البتات المناسبة لكل شجرة
+        self.soil_bits = FrozenDict(
+            (name, 1 << bit) for bit, name in enumerate(sorted(frozenset().union(*self.soil_types)))
+        )
+        self.soil_masks = _readonly_array(
+            [sum(self.soil_bits[name] for name in soils) for soils in self.soil_types], dtype=np.int64
+        )
+
+        # المناخ كمصفوفة (عدد المحافظات، 4 فصول، الحقول الرقمية) مع NaN للفصول غير المتوفرة
+        climate = np.full((len(self.governorate_names), len(SEASONS_AR), len(CLIMATE_FIELDS)), np.nan)
+        for g, gov_name_ar in enumerate(self.governorate_names):
+            gov_data = self.climate_db['governorates'][gov_name_ar]
+            for s, season_ar in enumerate(SEASONS_AR):
+                if season_ar in gov_data:
+                    climate[g, s] = [gov_data[season_ar].get(name, default) for name, default in CLIMATE_FIELDS]
+        climate.flags.writeable = False
+        self.climate = climate
+
+    @classmethod
+    def from_files(cls):
+        """تحميل البيانات من ملفات JSON"""
+        return cls(_load_json(TREES_FILE), _load_json(CLIMATE_FILE))
+
+    def soil_bit(self, soil_type):
+        """بت نوع التربة (0 إذا لم يكن مناسباً لأي شجرة)"""
+        return self.soil_bits.get(soil_type.lower(), 0)
+
+    @property
+    def nbytes(self):
+        """حجم المصفوفات الرقمية بالبايت"""
+        return (self.climate.nbytes + self.soil_masks.nbytes
+                + sum(a.nbytes for a in self.requirements.values()))
+
+
+_dataset = None
+
+
+def get_dataset():
+    """بيانات العملية المشتركة (تُحمّل عند أول استخدام)"""
+    global _dataset
+    if _dataset is None:
+        _dataset = OmanDataset.from_files()
+    return _dataset
+
+
+def set_dataset(dataset):
+    """استبدال البيانات المشتركة بعد إعادة التحميل"""
+    global _dataset
+    _dataset = dataset
@@ -0,0 +1,130 @@
+"""
+منفّذ الاستدلال المحدود
+يشغّل استدعاءات sklearn المتزامنة في مجمّع خيوط أو عمليات مع طابور محدود الحجم
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from backend.app import metrics, timing
+
+
+class ExecutorSaturatedError(Exception):
+    """الطابور ممتلئ ولا يمكن قبول مهام جديدة"""
+
+
+def _timed_call(fn, args, kwargs):
+    """تنفيذ المهمة وإرجاع وقت بدئها والمقاييس التي سجلتها مع النتيجة"""
+    started_at = time.time()
+    result, observations = metrics.collect(fn, *args, **kwargs)
+    return started_at, observations, result
+
+
+class InferenceExecutor:
+    """مجمّع تنفيذ محدود: عدد العمال + حجم الطابور هو الحد الأقصى للمهام المعلقة"""
+
+    def __init__(self, kind='thread', workers=4, queue_size=64):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"نوع مجمّع غير معروف: {kind}")
+
+        self.kind = kind
+        self.workers = workers
+        self.queue_size = queue_size
+        self._pool = None
+        # إعادة التحميل تستبدل المجمّع من خيط آخر: الحصول عليه والإرسال إليه وإيقافه تحت هذا القفل
+        self._pool_lock = threading.Lock()
+        self._in_flight = 0
+
+        # إحصائيات لتحديد عدد العمال المناسب
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _get_pool(self):
+        """إنشاء المجمّع عند أول استخدام (يُستدعى تحت _pool_lock)"""
+        if self._pool is None:
+            if self.kind == 'process':
+                # في وضع العمليات يجب أن تكون الدوال معرّفة على مستوى الوحدة
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='inference')
+        return self._pool
+
+    def _submit(self, fn):
+        """إرسال المهمة إلى المجمّع الحالي دون أن يُوقفه restart بين الحصول عليه والإرسال"""
+        with self._pool_lock:
+            return self._get_pool().submit(fn)
+
+    @property
+    def queue_depth(self):
+        """عدد المهام المنتظرة التي لم يبدأ تنفيذها بعد"""
+        return max(0, self._in_flight - self.workers)
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        تنفيذ دالة متزامنة خارج حلقة الأحداث
+        
+        Raises:
+            ExecutorSaturatedError: عند امتلاء الطابور
+        """
+        if self._in_flight >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise ExecutorSaturatedError("الخادم مشغول، حاول لاحقاً")
+
+        self._in_flight += 1
+        self.submitted += 1
+        submitted_at = time.time()
+        try:
+            started_at, observations, result = await asyncio.wrap_future(
+                self._submit(functools.partial(_timed_call, fn, args, kwargs))
+            )
+        finally:
+            self._in_flight -= 1
+
+        # المقاييس المسجلة في العامل (خيط أو عملية) تُطبق هنا على مقاييس العملية الرئيسية
+        metrics.replay(observations)
+        timing.absorb(observations)
+
+        wait = max(0.0, started_at - submitted_at)
+        timing.record('queue', wait)
+        self.completed += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return result
+
+    def stats(self):
+        """إحصائيات الطابور وزمن الانتظار"""
+        return {
+            'pool': self.kind,
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'queue_depth': self.queue_depth,
+            'in_flight': self._in_flight,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'avg_wait_ms': round(self.total_wait / self.completed * 1000, 3) if self.completed else 0.0,
+            'max_wait_ms': round(self.max_wait * 1000, 3)
+        }
+
+    def restart(self):
+        """
+        استبدال المجمّع بمجمّع جديد (بعد إعادة التحميل تُنشأ عمليات جديدة بالنسخة الحالية)
+        المهام الجارية في المجمّع القديم تكتمل قبل إيقافه
+        """
+        with self._pool_lock:
+            old_pool, self._pool = self._pool, None
+            if old_pool is not None:
+                old_pool.shutdown(wait=False)
+
+    def shutdown(self):
+        """إيقاف المجمّع"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
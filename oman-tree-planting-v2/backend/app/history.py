@@ -0,0 +1,186 @@
+"""
+سجل المحادثات لكل جلسة
+حلقة محدودة لكل جلسة، مع إخراج الجلسات الخاملة وحد أقصى للذاكرة،
+ونقل اختياري للجلسات المُخرجة إلى SQLite على القرص (بحد أقصى لعدد الرسائل المنقولة)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+def _turn_size(turn):
+    """تقدير حجم الرسالة في الذاكرة بالبايت"""
+    size = len(turn['user'].encode('utf-8')) + len(turn['bot'].encode('utf-8'))
+    if turn['context']:
+        size += len(json.dumps(turn['context'], ensure_ascii=False).encode('utf-8'))
+    return size + 64
+
+
+class _Session:
+    """جلسة واحدة: حلقة رسائل ووقت آخر استخدام"""
+
+    __slots__ = ('turns', 'last_seen', 'size')
+
+    def __init__(self, max_turns):
+        self.turns = deque(maxlen=max_turns)
+        self.last_seen = time.monotonic()
+        self.size = 0
+
+
+class ConversationStore:
+    """مخزن سجل المحادثات مفهرس بمعرّف الجلسة (آمن للاستخدام من عدة خيوط)"""
+
+    def __init__(self, max_turns=20, idle_ttl=1800, max_bytes=16 * 1024 * 1024, spill_path=None,
+                 max_spill_turns=100_000):
+        """
+        Args:
+            max_turns: أقصى عدد رسائل محفوظة لكل جلسة
+            idle_ttl: مدة الخمول (ثواني) قبل إخراج الجلسة من الذاكرة
+            max_bytes: الحد الأقصى لحجم جميع الجلسات في الذاكرة
+            spill_path: مسار SQLite لنقل الجلسات المُخرجة (اختياري)
+            max_spill_turns: أقصى عدد رسائل في SQLite (تُحذف الأقدم عند تجاوزه)
+        """
+        self.max_turns = max_turns
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evicted_sessions = 0
+
+        self.spill_path = spill_path
+        self.max_spill_turns = max_spill_turns
+        self._db = None
+        self._db_pid = None
+        # قفل منفصل لـ SQLite: الكتابة على القرص لا تحجز قفل الجلسات
+        self._db_lock = threading.Lock()
+        self._spilled = 0
+        self.spill_deleted = 0
+
+    def _connection(self):
+        """اتصال SQLite لهذه العملية (يُفتح عند أول استخدام وبعد التفرع، تحت _db_lock)"""
+        if not self.spill_path:
+            return None
+
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.spill_path, check_same_thread=False)
+            self._db_pid = os.getpid()
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS turns ('
+                'session_id TEXT NOT NULL, ts REAL NOT NULL, user TEXT, context TEXT, bot TEXT)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, ts)')
+            self._db.commit()
+            self._spilled = self._db.execute('SELECT COUNT(*) FROM turns').fetchone()[0]
+        return self._db
+
+    def append(self, session_id, user_message, context, answer):
+        """إضافة رسالة وردها إلى سجل الجلسة"""
+        turn = {'user': user_message, 'context': context, 'bot': answer, 'ts': time.time()}
+        size = _turn_size(turn)
+        # الرسائل المُخرجة من الذاكرة تُكتب على القرص بعد تحرير قفل الجلسات
+        spilled = []
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session(self.max_turns)
+
+            if len(session.turns) == session.turns.maxlen:
+                dropped = session.turns[0]
+                dropped_size = _turn_size(dropped)
+                session.size -= dropped_size
+                self._bytes -= dropped_size
+                spilled.append((session_id, dropped))
+
+            session.turns.append(turn)
+            session.size += size
+            self._bytes += size
+            session.last_seen = time.monotonic()
+            self._sessions.move_to_end(session_id)
+
+            self._evict(spilled)
+
+        self._spill(spilled)
+
+    def get(self, session_id):
+        """سجل الجلسة كاملاً: الرسائل المنقولة إلى القرص ثم الرسائل في الذاكرة"""
+        turns = []
+        if self.spill_path:
+            with self._db_lock:
+                rows = self._connection().execute(
+                    'SELECT ts, user, context, bot FROM turns WHERE session_id = ? ORDER BY ts',
+                    (session_id,)
+                ).fetchall()
+            turns = [
+                {'user': user, 'context': json.loads(context) if context else None, 'bot': bot, 'ts': ts}
+                for ts, user, context, bot in rows
+            ]
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                turns.extend(session.turns)
+            return turns
+
+    def _evict(self, spilled):
+        """
+        إخراج الجلسات الخاملة ثم الأقدم استخداماً حتى النزول تحت حد الذاكرة
+
+        Args:
+            spilled: قائمة تُضاف إليها (معرّف الجلسة، الرسالة) المُخرجة لكتابتها على القرص
+        """
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen <= self.idle_ttl and self._bytes <= self.max_bytes:
+                break
+
+            del self._sessions[session_id]
+            self._bytes -= session.size
+            self.evicted_sessions += 1
+            spilled.extend((session_id, turn) for turn in session.turns)
+
+    def _spill(self, spilled):
+        """
+        نقل الرسائل إلى SQLite (إن كان مفعّلاً) خارج قفل الجلسات،
+        مع حذف الأقدم عند تجاوز max_spill_turns
+        """
+        if not self.spill_path or not spilled:
+            return
+
+        rows = [
+            (session_id, turn['ts'], turn['user'],
+             json.dumps(turn['context'], ensure_ascii=False) if turn['context'] else None, turn['bot'])
+            for session_id, turn in spilled
+        ]
+        with self._db_lock:
+            db = self._connection()
+            db.executemany('INSERT INTO turns (session_id, ts, user, context, bot) VALUES (?, ?, ?, ?, ?)', rows)
+            self._spilled += len(rows)
+
+            excess = self._spilled - self.max_spill_turns
+            if excess > 0:
+                db.execute('DELETE FROM turns WHERE rowid IN (SELECT rowid FROM turns ORDER BY rowid LIMIT ?)', (excess,))
+                self._spilled -= excess
+                self.spill_deleted += excess
+            db.commit()
+
+    def stats(self):
+        """إحصائيات المخزن"""
+        return {
+            'sessions': len(self._sessions),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'max_turns': self.max_turns,
+            'idle_ttl': self.idle_ttl,
+            'evicted_sessions': self.evicted_sessions,
+            'spill': bool(self.spill_path),
+            'spilled_turns': self._spilled,
+            'max_spill_turns': self.max_spill_turns,
+            'spill_deleted': self.spill_deleted
+        }
@@ -3,20 +3,112 @@ FastAPI Backend - REST API للمنصة
 يوفر endpoints للتنبؤ والـ chatbot والبيانات
 """
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hmac
+import json
+import math
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List, Dict
 import uvicorn
 
-from backend.app.ml_model import predictor
-from backend.app.chatbot import chatbot
+from backend.app import config, metrics, timing
+from backend.app.ml_model import TreeSuccessPredictor, predictor
+from backend.app.chatbot import OmanTreeChatbot, chatbot
+from backend.app.catalog import TreeCatalog, set_catalog
+from backend.app.compression import CompressionMiddleware
+from backend.app.data import CLIMATE_FILE, DATA_DIR, TREES_FILE
+from backend.app.batching import BATCH_ERRORS, PredictionBatcher
+from backend.app.executor import ExecutorSaturatedError, InferenceExecutor
+from backend.app.memory import process_memory
+from backend.app.payloads import CatalogPayloads
+from backend.app.profiler import SamplingProfiler
+from backend.app.reloader import HotReloader
+from backend.app.tables import ResponseTables
+
+# منفّذ الاستدلال (خارج حلقة الأحداث)
+inference = InferenceExecutor(
+    kind=config.INFERENCE_POOL,
+    workers=config.INFERENCE_WORKERS,
+    queue_size=config.INFERENCE_QUEUE_SIZE
+)
+
+# النصائح والتوصيات المحسوبة مسبقاً لكل محافظة × فصل
+tables = ResponseTables(chatbot, predictor)
+
+# استجابات الكتالوج الثابتة مسلسلة مسبقاً (تُعاد عند إعادة التحميل فقط)
+catalog_payloads = CatalogPayloads(predictor.catalog)
+
+def warm_up():
+    """بناء الجداول الثابتة ثم تحميل النموذج وبناء توصياته"""
+    tables.refresh(wait=True)
+    if predictor.ensure_loaded():
+        tables.refresh(wait=True)
+
+def build_services():
+    """
+    بناء نسخة جديدة كاملة: البيانات والفهارس والنموذج والـ Chatbot والجداول
+    يعمل في الخلفية بينما تستمر الطلبات على النسخة الحالية
+    """
+    catalog = TreeCatalog.from_files()
+    
+    new_predictor = TreeSuccessPredictor(catalog)
+    if not new_predictor.ensure_loaded() and predictor.is_ready:
+        # لا نستبدل نموذجاً يعمل بنسخة بدون نموذج
+        raise RuntimeError(f"تعذر تحميل النموذج الجديد: {new_predictor.load_error}")
+    
+    # سجل المحادثات ينتقل كما هو إلى النسخة الجديدة
+    new_chatbot = OmanTreeChatbot(catalog, history=chatbot.history)
+    new_tables = ResponseTables(new_chatbot, new_predictor)
+    new_tables.refresh(wait=True)
+    return new_predictor, new_chatbot, new_tables, CatalogPayloads(catalog)
+
+def swap_services(services):
+    """استبدال النسخة الحالية بالجديدة (الطلبات الجارية تكمل على المراجع القديمة)"""
+    global predictor, chatbot, tables, catalog_payloads
+    predictor, chatbot, tables, catalog_payloads = services
+    set_catalog(predictor.catalog)
+    # عمال مجمّع العمليات يحملون نسخة قديمة منذ التفرع
+    if inference.kind == 'process':
+        inference.restart()
+
+def reload_watch_paths():
+    """ملفات البيانات والنموذج المراقبة لإعادة التحميل"""
+    model_files = ('rf_model.pkl', 'gb_model.pkl', 'scaler.pkl', 'engine/meta.json')
+    return [DATA_DIR / TREES_FILE, DATA_DIR / CLIMATE_FILE] + [config.MODEL_DIR / name for name in model_files]
+
+reloader = HotReloader(
+    build_services,
+    swap_services,
+    watch_paths=reload_watch_paths,
+    interval=config.RELOAD_WATCH_INTERVAL
+)
+
+# مُحلّل الأداء بأخذ العينات (متوقف حتى يُشغّل من /admin/profiler/start)
+profiler = SamplingProfiler(config.PROFILER_OUTPUT, interval_ms=config.PROFILER_INTERVAL_MS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # تحميل النموذج والجداول في الخلفية دون تعطيل بدء الخادم
+    loading = asyncio.get_running_loop().run_in_executor(None, warm_up)
+    reloader.start()
+    yield
+    reloader.stop()
+    profiler.stop()
+    inference.shutdown()
+    loading.cancel()
 
 # تهيئة FastAPI
 app = FastAPI(
     title="منصة زراعة الأشجار الذكية - عُمان",
     description="نظام ذكي لتحليل نجاح زراعة الأشجار في محافظات عمان",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # تفعيل CORS للواجهة الأمامية
@@ -28,8 +120,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ضغط الاستجابات الديناميكية (الثابتة تُرسل بنسخها المضغوطة مسبقاً، والبث دون ضغط)
+app.add_middleware(CompressionMiddleware)
+
+# زمن كل مرحلة في ترويسة Server-Timing
+app.add_middleware(timing.ServerTimingMiddleware)
+
+# عدد الطلبات وزمنها لكل مسار (الطبقة الخارجية: يشمل زمن الضغط)
+app.add_middleware(metrics.MetricsMiddleware)
+
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError):
+    """
+    422 كالمعالج الافتراضي، مع تمثيل قيم الإدخال NaN و Infinity كنص
+    (وإلا يفشل تسلسل الاستجابة نفسها ويصل الطلب المرفوض كخطأ 500)
+    """
+    errors = []
+    for error in exc.errors():
+        value = error.get('input')
+        if isinstance(value, float) and not math.isfinite(value):
+            error = {**error, 'input': str(value)}
+        errors.append(error)
+    return JSONResponse(status_code=422, content={"detail": jsonable_encoder(errors)})
+
 # Models
 class PredictionRequest(BaseModel):
+    # رفض NaN و Infinity في المعايير المخصصة (422) قبل وصولها للنموذج والذاكرة
+    model_config = ConfigDict(allow_inf_nan=False)
+    
     governorate: str
     season: str
     tree_name: str
@@ -43,6 +161,82 @@ class PredictionRequest(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     context: Optional[Dict] = None
+    session_id: Optional[str] = None
+
+def build_custom_params(request: PredictionRequest) -> Optional[Dict]:
+    """بناء المعايير المخصصة من طلب التنبؤ"""
+    custom_params = {}
+    if request.rainfall is not None:
+        custom_params['rainfall'] = request.rainfall
+    if request.temperature is not None:
+        custom_params['temperature_avg'] = request.temperature
+    if request.humidity is not None:
+        custom_params['humidity'] = request.humidity
+    if request.pH is not None:
+        custom_params['pH'] = request.pH
+    if request.organic_matter is not None:
+        custom_params['organic_matter'] = request.organic_matter
+    if request.soil_type is not None:
+        custom_params['soil_type'] = request.soil_type
+    return custom_params if custom_params else None
+
+# مهام الاستدلال (على مستوى الوحدة لتعمل مع مجمّع العمليات أيضاً)
+def predict_task(requests: List[Dict]) -> List[Dict]:
+    predictor.ensure_loaded()
+    return predictor.predict_many(requests)
+
+def chat_task(message: str, context: Optional[Dict]) -> Dict:
+    return chatbot.get_response(user_message=message, context=context)
+
+def chat_answer_task(message: str, context: Optional[Dict]) -> Dict:
+    return chatbot.get_answer(message, context)
+
+def chat_followups_task(message: str, context: Optional[Dict], matched: bool) -> Dict:
+    return chatbot.get_followups(message, context, matched)
+
+def seasonal_advice_task(governorate: str, season: str) -> str:
+    return chatbot.get_seasonal_advice(governorate, season)
+
+def recommendations_task(governorate: str, season: str, limit: int, rank_by: str) -> List[Dict]:
+    if rank_by == "ml":
+        predictor.ensure_loaded()
+        return predictor.recommend_trees(governorate, season, limit)
+    return chatbot.get_tree_recommendation(governorate, season, limit)
+
+async def run_inference(fn, *args):
+    """تنفيذ مهمة استدلال في المنفّذ المحدود، مع 503 عند امتلاء الطابور"""
+    try:
+        return await inference.run(fn, *args)
+    except ExecutorSaturatedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(config.INFERENCE_RETRY_AFTER)}
+        )
+
+async def remember_turn(request: ChatRequest, answer: str):
+    """
+    حفظ الرسالة في سجل الجلسة في العملية الرئيسية بعد الاستدلال (لا في عامل المجمّع)
+    مع SQLite تُنفذ في خيط لأن إخراج الرسائل قد يكتب على القرص
+    """
+    if not request.session_id:
+        return
+    if chatbot.history.spill_path:
+        await asyncio.to_thread(chatbot.remember, request.session_id, request.message, request.context, answer)
+    else:
+        chatbot.remember(request.session_id, request.message, request.context, answer)
+
+async def run_predict_batch(requests: List[Dict]) -> List[Dict]:
+    return await run_inference(predict_task, requests)
+
+# تجميع طلبات التنبؤ المتزامنة في مصفوفة واحدة
+# run_inference يحوّل امتلاء الطابور إلى 503 (HTTPException) فهو خطأ للدفعة كاملة
+batcher = PredictionBatcher(
+    run_predict_batch,
+    window_ms=config.BATCH_WINDOW_MS,
+    max_batch_size=config.BATCH_MAX_SIZE,
+    batch_errors=BATCH_ERRORS + (HTTPException,)
+)
 
 # Health Check
 @app.get("/")
@@ -54,6 +248,7 @@ async def root():
         "endpoints": {
             "predict": "/api/predict",
             "chat": "/api/chat",
+            "chat_stream": "/api/chat/stream",
             "trees": "/api/trees",
             "governorates": "/api/governorates",
             "seasonal_advice": "/api/seasonal-advice"
@@ -62,43 +257,85 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "ml_model": "loaded", "chatbot": "active"}
+    return {
+        "status": "healthy" if predictor.is_ready else "degraded",
+        "ml_model": predictor.status,
+        "chatbot": "active",
+        "inference": inference.stats(),
+        "batching": batcher.stats(),
+        "prediction_cache": predictor.cache.stats(),
+        "chat_history": chatbot.history.stats(),
+        "response_tables": tables.stats(),
+        "catalog_payload_bytes": catalog_payloads.nbytes,
+        "reload": reloader.stats(),
+        "profiler": profiler.stats(),
+        "memory": {**process_memory(), "model": predictor.model_memory()}
+    }
+
+# مقاييس لحظية تُقرأ عند طلب /metrics (من النسخة الحالية بعد أي إعادة تحميل)
+# بدون /proc لا يتوفر RSS الحالي فيُحذف المقياس (لا يُعرض الأقصى على أنه الحالي)
+metrics.Gauge('oman_process_resident_memory_bytes', 'ذاكرة العملية المقيمة (RSS)',
+              collect=lambda: process_memory().get('rss_bytes'))
+metrics.Gauge('oman_model_ready', 'هل النموذج محمّل وجاهز (1) أم لا (0)',
+              collect=lambda: int(predictor.is_ready))
+metrics.Gauge('oman_inference_queue_depth', 'المهام المنتظرة في منفّذ الاستدلال',
+              collect=lambda: inference.queue_depth)
+metrics.Gauge('oman_inference_in_flight', 'المهام الجارية أو المنتظرة في منفّذ الاستدلال',
+              collect=lambda: inference.stats()['in_flight'])
+metrics.Gauge('oman_reload_version', 'عدد مرات إعادة التحميل الناجحة',
+              collect=lambda: reloader.version)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """المقاييس بصيغة Prometheus النصية"""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+# Liveness: العملية تعمل وحلقة الأحداث تستجيب
+@app.get("/health/live")
+async def liveness_check():
+    return {"status": "alive"}
+
+# Readiness: النموذج محمّل وجاهز لاستقبال التنبؤات
+@app.get("/health/ready")
+async def readiness_check():
+    if not predictor.is_ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "not_ready", "ml_model": predictor.status, "error": predictor.load_error}
+        )
+    return {"status": "ready", "ml_model": predictor.status}
 
 # Prediction Endpoint
 @app.post("/api/predict")
-async def predict_success(request: PredictionRequest):
+async def predict_success(request: PredictionRequest, http_request: Request):
     """
     التنبؤ بنجاح زراعة شجرة معينة
     """
     try:
-        # بناء المعايير المخصصة
-        custom_params = {}
-        if request.rainfall is not None:
-            custom_params['rainfall'] = request.rainfall
-        if request.temperature is not None:
-            custom_params['temperature_avg'] = request.temperature
-        if request.humidity is not None:
-            custom_params['humidity'] = request.humidity
-        if request.pH is not None:
-            custom_params['pH'] = request.pH
-        if request.organic_matter is not None:
-            custom_params['organic_matter'] = request.organic_matter
-        if request.soil_type is not None:
-            custom_params['soil_type'] = request.soil_type
+        custom_params = build_custom_params(request)
         
-        # الحصول على التنبؤ
-        result = predictor.predict_success(
-            governorate=request.governorate,
-            season=request.season,
-            tree_name=request.tree_name,
-            custom_params=custom_params if custom_params else None
-        )
+        # الطلبات بدون معايير مخصصة تُجاب من الأطلس مباشرة (مسلسلة ومضغوطة مسبقاً)
+        if not custom_params:
+            payload = tables.prediction(request.governorate, request.season, request.tree_name)
+            if payload is not None:
+                metrics.CACHE_REQUESTS.inc('atlas', 'hit')
+                return encoded_response(payload, http_request)
+        
+        # الحصول على التنبؤ ضمن دفعة مجمّعة
+        result = await batcher.submit({
+            'governorate': request.governorate,
+            'season': request.season,
+            'tree_name': request.tree_name,
+            'custom_params': custom_params
+        })
         
         return {
             "success": True,
             "data": result
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -109,73 +346,200 @@ async def chat_endpoint(request: ChatRequest):
     التفاعل مع Chatbot الذكي
     """
     try:
-        response = chatbot.get_response(
-            user_message=request.message,
-            context=request.context
-        )
+        response = await run_inference(chat_task, request.message, request.context)
+        await remember_turn(request, response['answer'])
         
         return {
             "success": True,
             "data": response
         }
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def sse_event(event: str, data) -> str:
+    """تنسيق حدث Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# Streaming Chatbot Endpoint
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    التفاعل مع Chatbot مع بث الرد (Server-Sent Events)
+    الأحداث بالترتيب: answer (أجزاء الجواب سطراً بسطر)، ثم details (الاقتراحات
+    والأشجار ذات الصلة ودرجة الثقة)، ثم done
+    """
+    try:
+        # يُحسب الجواب قبل بدء البث ليُرجع 503 / 400 كاستجابة عادية
+        answer = await run_inference(chat_answer_task, request.message, request.context)
+        await remember_turn(request, answer['answer'])
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    async def events():
+        for chunk in answer['answer'].splitlines(keepends=True):
+            yield sse_event("answer", {"delta": chunk})
+        
+        try:
+            followups = await run_inference(
+                chat_followups_task, request.message, request.context, answer['confidence'] > 0
+            )
+        except HTTPException as e:
+            yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+            return
+        except Exception as e:
+            yield sse_event("error", {"status_code": 500, "detail": str(e)})
+            return
+        
+        yield sse_event("details", {**followups, "confidence": answer['confidence']})
+        yield sse_event("done", {})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Chat History
+@app.get("/api/chat/history/{session_id}")
+async def chat_history(session_id: str):
+    """
+    سجل محادثة جلسة محددة
+    """
+    if chatbot.history.spill_path:
+        # قراءة الرسائل المنقولة من SQLite خارج حلقة الأحداث
+        history = await asyncio.to_thread(chatbot.history.get, session_id)
+    else:
+        history = chatbot.history.get(session_id)
+    return {
+        "success": True,
+        "count": len(history),
+        "data": history
+    }
+
+def require_admin(x_admin_token: Optional[str]):
+    """التحقق من رمز الإدارة (403 إذا كانت نقاط الإدارة معطلة أو الرمز غير صالح)"""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="نقاط الإدارة غير مفعّلة (OMAN_ADMIN_TOKEN)")
+    if not hmac.compare_digest(x_admin_token or "", config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="رمز غير صالح")
+
+# Hot Reload
+@app.post("/admin/reload")
+async def admin_reload(x_admin_token: Optional[str] = Header(None)):
+    """
+    إعادة تحميل البيانات والنماذج دون إعادة تشغيل (يتطلب OMAN_ADMIN_TOKEN)
+    """
+    require_admin(x_admin_token)
+    
+    reloaded = await asyncio.get_running_loop().run_in_executor(None, reloader.reload)
+    if not reloaded:
+        raise HTTPException(status_code=500, detail=reloader.last_error)
+    
+    return {
+        "success": True,
+        "data": reloader.stats()
+    }
+
+# Sampling Profiler
+@app.post("/admin/profiler/start")
+async def admin_profiler_start(interval_ms: Optional[float] = None, x_admin_token: Optional[str] = Header(None)):
+    """
+    بدء أخذ عينات المكدسات (يتطلب OMAN_ADMIN_TOKEN)
+    """
+    require_admin(x_admin_token)
+    if interval_ms is not None and interval_ms <= 0:
+        raise HTTPException(status_code=400, detail="interval_ms يجب أن يكون أكبر من 0")
+    if not profiler.start(interval_ms):
+        raise HTTPException(status_code=409, detail="المُحلّل يعمل بالفعل")
+    
+    return {
+        "success": True,
+        "data": profiler.stats()
+    }
+
+@app.post("/admin/profiler/stop")
+async def admin_profiler_stop(x_admin_token: Optional[str] = Header(None)):
+    """
+    إيقاف أخذ العينات وكتابة المكدسات المطوية إلى OMAN_PROFILER_OUTPUT
+    """
+    require_admin(x_admin_token)
+    stats = await asyncio.get_running_loop().run_in_executor(None, profiler.stop)
+    return {
+        "success": True,
+        "data": stats
+    }
+
+def encoded_response(payload, request: Request, headers=None) -> Response:
+    """استجابة مسلسلة مسبقاً بالنسخة المضغوطة المناسبة لـ Accept-Encoding"""
+    body, encoding, etag = payload.select(request.headers.get("accept-encoding"))
+    headers = dict(headers or {})
+    if payload.encoded:
+        headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if "ETag" in headers:
+        headers["ETag"] = etag
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def static_response(payload, request: Request) -> Response:
+    """استجابة مسلسلة مسبقاً مع ETag، أو 304 إذا كانت نسخة العميل مطابقة"""
+    headers = {
+        "ETag": payload.etag,
+        "Cache-Control": f"public, max-age={config.CATALOG_MAX_AGE}"
+    }
+    if payload.matches(request.headers.get("if-none-match")):
+        headers["ETag"] = payload.select(request.headers.get("accept-encoding"))[2]
+        if payload.encoded:
+            headers["Vary"] = "Accept-Encoding"
+        return Response(status_code=304, headers=headers)
+    return encoded_response(payload, request, headers)
 
 # Get All Trees
 @app.get("/api/trees")
-async def get_all_trees():
+async def get_all_trees(
+    request: Request,
+    fields: Optional[str] = None,
+    tree_type: Optional[str] = Query(None, alias='type'),
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
     """
     الحصول على قائمة بجميع الأشجار
+    fields: الحقول المطلوبة (مثل name,name_en)، type: تصفية بنوع الشجرة،
+    limit و cursor: التقسيم إلى صفحات (cursor من next_cursor في الصفحة السابقة)
     """
-    try:
-        trees = predictor.get_all_trees()
-        return {
-            "success": True,
-            "count": len(trees),
-            "data": trees
-        }
+    if fields is None and tree_type is None and limit is None and cursor is None:
+        return static_response(catalog_payloads.trees, request)
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    try:
+        payload = catalog_payloads.tree_page(fields, tree_type, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return static_response(payload, request)
 
 # Get Specific Tree
 @app.get("/api/trees/{tree_name}")
-async def get_tree_info(tree_name: str):
+async def get_tree_info(tree_name: str, request: Request):
     """
     الحصول على معلومات شجرة محددة
     """
-    try:
-        tree = predictor._get_tree_info(tree_name)
-        if not tree:
-            raise HTTPException(status_code=404, detail="الشجرة غير موجودة")
-        
-        return {
-            "success": True,
-            "data": tree
-        }
-    
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    payload = catalog_payloads.tree(tree_name)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="الشجرة غير موجودة")
+    return static_response(payload, request)
 
 # Get All Governorates
 @app.get("/api/governorates")
-async def get_all_governorates():
+async def get_all_governorates(request: Request):
     """
     الحصول على قائمة بجميع المحافظات
     """
-    try:
-        governorates = predictor.get_all_governorates()
-        return {
-            "success": True,
-            "count": len(governorates),
-            "data": governorates
-        }
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return static_response(catalog_payloads.governorates, request)
 
 # Get Seasonal Advice
 @app.get("/api/seasonal-advice/{governorate}/{season}")
@@ -183,8 +547,12 @@ async def get_seasonal_advice(governorate: str, season: str):
     """
     الحصول على نصائح موسمية لمحافظة معينة
     """
+    body = tables.seasonal_advice(governorate, season)
+    if body is not None:
+        return Response(content=body, media_type="application/json")
+    
     try:
-        advice = chatbot.get_seasonal_advice(governorate, season)
+        advice = await run_inference(seasonal_advice_task, governorate, season)
         return {
             "success": True,
             "data": {
@@ -194,22 +562,34 @@ async def get_seasonal_advice(governorate: str, season: str):
             }
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Get Tree Recommendations
 @app.get("/api/recommendations/{governorate}/{season}")
-async def get_recommendations(governorate: str, season: str, limit: int = 5):
+async def get_recommendations(governorate: str, season: str, limit: int = 5, rank_by: str = "heuristic"):
     """
     الحصول على توصيات الأشجار لمحافظة وموسم
+    rank_by: heuristic (درجة التوافق المناخي) أو ml (نسبة النجاح من النموذج)
     """
+    if rank_by not in ("heuristic", "ml"):
+        raise HTTPException(status_code=400, detail="rank_by يجب أن يكون heuristic أو ml")
+    
+    body = tables.recommendations(governorate, season, limit, rank_by)
+    if body is not None:
+        return Response(content=body, media_type="application/json")
+    
     try:
-        recommendations = chatbot.get_tree_recommendation(governorate, season)
+        recommendations = await run_inference(recommendations_task, governorate, season, max(limit, 0), rank_by)
         return {
             "success": True,
-            "data": recommendations[:limit]
+            "data": recommendations
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -240,22 +620,18 @@ async def batch_predict(requests: List[PredictionRequest]):
     """
     تنبؤات متعددة دفعة واحدة
     """
+    metrics.PREDICT_BATCH_SIZE.observe(len(requests), 'batch_endpoint')
     try:
-        results = []
-        for req in requests:
-            custom_params = {}
-            if req.rainfall is not None:
-                custom_params['rainfall'] = req.rainfall
-            if req.temperature is not None:
-                custom_params['temperature_avg'] = req.temperature
-            
-            result = predictor.predict_success(
-                governorate=req.governorate,
-                season=req.season,
-                tree_name=req.tree_name,
-                custom_params=custom_params if custom_params else None
-            )
-            results.append(result)
+        # تنبؤ موحد لكل الطلبات (مصفوفة واحدة لكل نموذج) بنفس ترتيب الإدخال
+        results = await run_inference(predict_task, [
+            {
+                'governorate': req.governorate,
+                'season': req.season,
+                'tree_name': req.tree_name,
+                'custom_params': build_custom_params(req)
+            }
+            for req in requests
+        ])
         
         return {
             "success": True,
@@ -263,6 +639,8 @@ async def batch_predict(requests: List[PredictionRequest]):
             "data": results
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -0,0 +1,42 @@
+"""
+قياس ذاكرة العملية
+يقرأ /proc/self/smaps_rollup (لينكس) للتمييز بين الصفحات المشتركة والخاصة
+"""
+
+import os
+import resource
+import sys
+
+
+def process_memory():
+    """
+    ذاكرة العملية الحالية بالبايت
+
+    Returns:
+        dict: rss_bytes، shared_bytes، private_bytes (الأخيرتان من smaps_rollup فقط)،
+              أو peak_rss_bytes (أقصى RSS منذ بدء العملية) حيث لا يتوفر /proc
+    """
+    try:
+        fields = {}
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+
+        return {
+            'rss_bytes': fields.get('Rss', 0),
+            'shared_bytes': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+            'private_bytes': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+        }
+    except OSError:
+        pass
+
+    try:
+        # أنوية لينكس الأقدم من 4.14: RSS الحالي بالصفحات (الحقل الثاني)
+        with open('/proc/self/statm', 'r') as f:
+            return {'rss_bytes': int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')}
+    except OSError:
+        # ru_maxrss هو الأقصى لا الحالي: بالكيلوبايت على لينكس وبالبايت على macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {'peak_rss_bytes': max_rss if sys.platform == 'darwin' else max_rss * 1024}
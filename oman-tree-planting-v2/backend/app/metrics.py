@@ -0,0 +1,275 @@
+"""
+مقاييس التشغيل بصيغة Prometheus النصية
+عدادات ومدرّجات خفيفة (قفل واحد لكل مقياس) تُسجل على المسار الساخن،
+ومقاييس لحظية (الذاكرة، الطابور، نسب الإصابة) تُحسب عند القراءة فقط
+"""
+
+import bisect
+import threading
+import time
+
+# حدود فئات مدرّجات الزمن (ثواني)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# حدود فئات مدرّجات أحجام الدفعات
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# جميع المقاييس المسجلة بالاسم (بترتيب التعريف)
+_metrics = {}
+
+# مخزن الالتقاط للخيط الحالي (انظر collect)
+_local = threading.local()
+
+
+def _escape(value):
+    """تهريب قيمة الوسم حسب الصيغة النصية"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values):
+    """{name="value",...} أو نص فارغ بدون وسوم"""
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value):
+    """تنسيق الرقم (الأعداد الصحيحة بدون فاصلة عشرية)"""
+    if isinstance(value, float) and value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """أساس المقاييس: الاسم والوصف وأسماء الوسوم والقيم لكل مجموعة وسوم"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        if name in _metrics:
+            raise ValueError(f"مقياس مكرر: {name}")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics[name] = self
+
+    def _record(self, labels, value):
+        """تسجيل قيمة، أو حفظها في مخزن الالتقاط إذا كان مفعّلاً في هذا الخيط"""
+        buffer = getattr(_local, 'buffer', None)
+        if buffer is not None:
+            buffer.append((self.name, labels, value))
+        else:
+            self._apply(labels, value)
+
+    def _apply(self, labels, value):
+        raise NotImplementedError
+
+    def render(self):
+        """أسطر الصيغة النصية لهذا المقياس"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """عداد تراكمي"""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        self._record(labels, amount)
+
+    def _apply(self, labels, value):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+                for labels, value in items]
+
+
+class Histogram(_Metric):
+    """مدرّج بفئات ثابتة (العدد لكل فئة، المجموع، العدد الكلي)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        self._record(labels, value)
+
+    def _apply(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                # [عدد كل فئة + فئة ما فوق الحد الأعلى، المجموع]
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+
+        lines = []
+        names = self.labelnames + ('le',)
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(names, labels + (_format_value(float(bound)),))} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(total)}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class Gauge(_Metric):
+    """قيمة لحظية تُحسب عند القراءة من دالة (لا تكلفة على المسار الساخن)"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        """
+        Args:
+            collect: دالة تُرجع {مجموعة الوسوم: القيمة}، أو رقماً للمقاييس بدون وسوم
+        """
+        super().__init__(name, documentation, labelnames)
+        self._collect = collect
+
+    def _samples(self):
+        try:
+            values = self._collect()
+        except Exception:
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+                for labels, value in values.items() if value is not None]
+
+
+def collect(fn, *args, **kwargs):
+    """
+    تنفيذ دالة مع التقاط المقاييس التي تسجلها بدلاً من تطبيقها
+    (في عمال مجمّع العمليات لا تصل المقاييس إلى العملية الرئيسية إلا عبر replay)
+
+    Returns:
+        tuple: (النتيجة، القياسات الملتقطة)
+    """
+    _local.buffer = buffer = []
+    try:
+        return fn(*args, **kwargs), buffer
+    finally:
+        _local.buffer = None
+
+
+def replay(observations):
+    """تطبيق قياسات ملتقطة بـ collect على مقاييس هذه العملية"""
+    for name, labels, value in observations:
+        _metrics[name]._apply(labels, value)
+
+
+def render():
+    """جميع المقاييس بصيغة Prometheus النصية"""
+    lines = []
+    for metric in list(_metrics.values()):
+        lines.extend(metric.render())
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class MetricsMiddleware:
+    """عدد الطلبات وزمنها لكل مسار (قالب المسار، لا المسار الفعلي، لتحديد عدد السلاسل)"""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    def _route(self, scope):
+        """قالب المسار المطابق للطلب"""
+        route = scope.get('route')
+        if route is not None:
+            return route.path
+
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return 'unmatched'
+        if self._routes is None:
+            self._routes = {
+                getattr(route, 'endpoint', None): route.path for route in scope['app'].routes
+            }
+        return self._routes.get(endpoint, 'unmatched')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = self._route(scope)
+            HTTP_REQUESTS.inc(scope['method'], route, str(status))
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, scope['method'], route)
+
+
+# مقاييس الطلبات
+HTTP_REQUESTS = Counter(
+    'oman_http_requests_total', 'عدد طلبات HTTP لكل مسار وحالة', ('method', 'route', 'status')
+)
+HTTP_REQUEST_DURATION = Histogram(
+    'oman_http_request_duration_seconds', 'زمن طلبات HTTP لكل مسار', ('method', 'route')
+)
+
+# مقاييس الاستدلال
+MODEL_PREDICT_DURATION = Histogram(
+    'oman_model_predict_proba_seconds', 'زمن predict_proba لكل نموذج في المجموعة', ('model', 'engine')
+)
+PREDICT_BATCH_SIZE = Histogram(
+    'oman_predict_batch_size', 'عدد الطلبات في كل دفعة تنبؤ', ('source',), buckets=SIZE_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    'oman_cache_requests_total', 'عمليات البحث في ذاكرات النتائج', ('cache', 'result')
+)
+
+# مقاييس الـ Chatbot
+CHAT_MATCH_DURATION = Histogram(
+    'oman_chat_match_seconds', 'زمن البحث عن أفضل سؤال مطابق في قاعدة الأسئلة'
+)
+
+
+def _hit_ratios():
+    """نسبة الإصابة لكل ذاكرة من العدادات"""
+    ratios = {}
+    for cache in sorted({labels[0] for labels in list(CACHE_REQUESTS._values)}):
+        hits = CACHE_REQUESTS.value(cache, 'hit')
+        total = hits + CACHE_REQUESTS.value(cache, 'miss')
+        ratios[(cache,)] = hits / total if total else 0.0
+    return ratios
+
+
+CACHE_HIT_RATIO = Gauge(
+    'oman_cache_hit_ratio', 'نسبة الإصابة لكل ذاكرة منذ بدء التشغيل', ('cache',), collect=_hit_ratios
+)
@@ -3,120 +3,215 @@
 يستخدم RandomForest و GradientBoosting مع بيانات عمانية حقيقية
 """
 
-import json
+import os
+import shutil
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.preprocessing import StandardScaler
 import joblib
 from pathlib import Path
 
+from backend.app import config, metrics, timing
+from backend.app.cache import PredictionCache
+from backend.app.catalog import SEASON_MAPPING, get_catalog
+from backend.app.data import CLIMATE_FIELDS, SEASONS_AR
+from backend.app.recommender import TreeRecommender, get_recommender
+from backend.app.tree_engine import CompiledEnsemble
+
+# أعمدة الخصائص المرمّزة (التربة، الفصل، نوع الشجرة) من _build_features
+CATEGORICAL_FEATURES = [3, 6, 7]
+
+# جميع نسخ النموذج في العملية (لإعادة تهيئة أقفالها بعد التفرع)
+_instances = weakref.WeakSet()
+
+def _reset_after_fork():
+    """إعادة تهيئة أقفال جميع النسخ في العملية الفرعية"""
+    for instance in list(_instances):
+        instance._after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def _atomic_dump(obj, path):
+    """حفظ الملف باسم مؤقت ثم استبداله (لا يرى القارئ ملفاً نصف مكتوب)"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+def _fit_model(model, X, y):
+    """تدريب نموذج وإرجاعه مع زمن التدريب (على مستوى الوحدة لتعمل في مجمّع العمليات)"""
+    started = time.perf_counter()
+    model.fit(X, y)
+    return model, time.perf_counter() - started
+
 class TreeSuccessPredictor:
-    def __init__(self):
+    def __init__(self, catalog=None):
         self.rf_model = None
         self.gb_model = None
         self.scaler = StandardScaler()
-        self.trees_db = self._load_trees_database()
-        self.climate_db = self._load_climate_database()
-        
-    def _load_trees_database(self):
-        """تحميل قاعدة بيانات الأشجار العمانية"""
-        db_path = Path(__file__).parent.parent.parent / 'data' / 'oman_trees_database.json'
-        with open(db_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
-    def _load_climate_database(self):
-        """تحميل البيانات المناخية الموسمية للمحافظات"""
-        db_path = Path(__file__).parent.parent.parent / 'data' / 'oman_seasonal_climate_data.json'
-        with open(db_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
-    def train_initial_model(self):
+        # محرك الاستدلال المُجمّع (اختياري، يُفعّل عبر OMAN_INFERENCE_ENGINE)
+        self.engine = None
+        # حالة النموذج: not_loaded / loading / ready / failed
+        self.status = 'not_loaded'
+        self.load_error = None
+        # زمن كل مرحلة في آخر تدريب (ثواني)
+        self.training_times = None
+        self._load_lock = threading.Lock()
+        _instances.add(self)
+        # الفهرس المشترك مع الـ Chatbot (فوق طبقة البيانات المشتركة للقراءة فقط)
+        self.catalog = catalog or get_catalog()
+        # محرك التوصيات لنفس الفهرس (لا المشترك للعملية: النسخة الجديدة تُبنى قبل استبدال الفهرس)
+        self.recommender = TreeRecommender(catalog) if catalog else get_recommender()
+        # أطلس النجاح المحسوب مسبقاً: (محافظة، فصل، شجرة) -> النتيجة
+        self.atlas = {}
+        # ذاكرة نتائج الطلبات ذات المعايير المخصصة
+        self.cache = PredictionCache(
+            max_size=config.PREDICTION_CACHE_SIZE,
+            ttl=config.PREDICTION_CACHE_TTL,
+            resolution=config.PREDICTION_CACHE_RESOLUTION
+        )
+        
+    @property
+    def trees_db(self):
+        """قاعدة بيانات الأشجار (من طبقة البيانات المشتركة)"""
+        return self.catalog.trees_db
+    
+    @property
+    def climate_db(self):
+        """البيانات المناخية (من طبقة البيانات المشتركة)"""
+        return self.catalog.climate_db
+    
+    def train_initial_model(self, parallel=None):
         """
         تدريب نموذج أولي بناءً على البيانات التاريخية
         يستخدم معايير متوافقة مع المناخ العماني
+        
+        Args:
+            parallel: تدريب RF و GB في عمليتين متزامنتين (RF على جميع الأنوية)؛
+                الافتراضي: عند توفر أكثر من نواة (على نواة واحدة يزيد إنشاء العمليات الزمن)
+        
+        الزمن الفعلي لكل مرحلة يُحفظ في self.training_times (بالثواني)
         """
+        times = {}
+        started = time.perf_counter()
+        
         # بيانات تدريب أولية (سيتم توسيعها بالبيانات الحقيقية)
         X_train, y_train = self._generate_training_data()
+        times['training_data'] = time.perf_counter() - started
         
         # تطبيع البيانات
+        phase = time.perf_counter()
         X_train_scaled = self.scaler.fit_transform(X_train)
+        times['scaling'] = time.perf_counter() - phase
         
-        # تدريب Random Forest
-        self.rf_model = RandomForestClassifier(
+        # Random Forest (الأشجار مستقلة: تُبنى على جميع الأنوية بنفس النتيجة لأي n_jobs)
+        rf_model = RandomForestClassifier(
             n_estimators=200,
             max_depth=15,
             min_samples_split=5,
-            random_state=42
+            random_state=42,
+            n_jobs=-1
         )
-        self.rf_model.fit(X_train_scaled, y_train)
         
-        # تدريب Gradient Boosting
-        self.gb_model = GradientBoostingClassifier(
+        # Gradient Boosting (تسلسلي بطبيعته: يعمل بالتوازي مع RF في عملية أخرى)
+        gb_model = GradientBoostingClassifier(
             n_estimators=150,
             learning_rate=0.1,
             max_depth=7,
             random_state=42
         )
-        self.gb_model.fit(X_train_scaled, y_train)
         
+        if parallel is None:
+            parallel = (os.cpu_count() or 1) > 1
+        
+        phase = time.perf_counter()
+        if parallel:
+            with ProcessPoolExecutor(max_workers=2) as pool:
+                rf_future = pool.submit(_fit_model, rf_model, X_train_scaled, y_train)
+                gb_future = pool.submit(_fit_model, gb_model, X_train_scaled, y_train)
+                (self.rf_model, times['rf_fit']), (self.gb_model, times['gb_fit']) = (
+                    rf_future.result(), gb_future.result()
+                )
+        else:
+            self.rf_model, times['rf_fit'] = _fit_model(rf_model, X_train_scaled, y_train)
+            self.gb_model, times['gb_fit'] = _fit_model(gb_model, X_train_scaled, y_train)
+        times['fit'] = time.perf_counter() - phase
+        
+        # الاستدلال يعمل بالتوازي على مستوى الطلبات (منفّذ الاستدلال)، لا داخل predict_proba
+        self.rf_model.set_params(n_jobs=None)
+        
+        phase = time.perf_counter()
+        self._on_model_ready()
+        times['engine_and_atlas'] = time.perf_counter() - phase
+        times['total'] = time.perf_counter() - started
+        
+        self.training_times = {name: round(seconds, 3) for name, seconds in times.items()}
+        self.status = 'ready'
         return True
     
     def _generate_training_data(self):
         """
         توليد بيانات تدريب من قاعدة البيانات والمعايير العمانية
-        """
-        X = []
-        y = []
-        
-        # تحويل أسماء الفصول من الإنجليزية إلى العربية
-        season_mapping = {
-            'spring': 'الربيع',
-            'summer': 'الصيف',
-            'autumn': 'الخريف',
-            'winter': 'الشتاء'
-        }
+        مثال لكل (محافظة، فصل متوفر، شجرة) بنفس الترتيب، محسوبة كمصفوفات
+        (مناخ المواسم × متطلبات الأشجار) بدلاً من حلقات متداخلة
         
-        # لكل محافظة وشجرة، نقوم بتوليد أمثلة تدريبية
-        for gov_name_ar, gov_data in self.climate_db['governorates'].items():
-            
-            for season_en, season_ar in season_mapping.items():
+        Returns:
+            tuple: (X بأعمدة الخصائص الثمانية، y = 1 إذا كان التوافق 0.7 أو أكثر)
+        """
+        dataset = self.catalog.dataset
+        req = dataset.requirements
+        
+        # المواسم المتوفرة بترتيب المحافظات ثم الفصول
+        climate_rows = []
+        soil_types = []
+        season_codes = []
+        for g, gov_name_ar in enumerate(dataset.governorate_names):
+            gov_data = self.climate_db['governorates'][gov_name_ar]
+            for season_en, season_ar in SEASON_MAPPING.items():
                 if season_ar not in gov_data:
                     continue
-                    
-                season_data_raw = gov_data[season_ar]
-                
-                # تحويل البيانات إلى الشكل المتوقع
-                season_data = {
-                    'rainfall': season_data_raw.get('rainfall_mm', 50),
-                    'temperature_avg': season_data_raw.get('avg_temperature', 25),
-                    'humidity': season_data_raw.get('humidity', 50),
-                    'soil_type': season_data_raw.get('soil_type', 'رملية'),
-                    'pH': season_data_raw.get('soil_ph', 7.5),
-                    'organic_matter': season_data_raw.get('organic_matter', 2.0)
-                }
-                
-                for tree in self.trees_db['trees']:
-                    # حساب التوافق بناءً على المعايير
-                    compatibility = self._calculate_compatibility(
-                        tree, season_data
-                    )
-                    
-                    # إنشاء مثال تدريبي
-                    features = [
-                        season_data['rainfall'],
-                        season_data['temperature_avg'],
-                        season_data['humidity'],
-                        self._encode_soil_type(season_data['soil_type']),
-                        season_data['pH'],
-                        season_data['organic_matter'],
-                        self._encode_season(season_en),
-                        self._encode_tree_type(tree['type'])
-                    ]
-                    
-                    X.append(features)
-                    y.append(1 if compatibility >= 0.7 else 0)
-        
-        return np.array(X), np.array(y)
+                climate_rows.append(dataset.climate[g, SEASONS_AR.index(season_ar)])
+                soil_types.append(gov_data[season_ar].get('soil_type', 'رملية'))
+                season_codes.append(self._encode_season(season_en))
+        
+        # (عدد المواسم، 1) مقابل متطلبات (عدد الأشجار)
+        climate = np.array(climate_rows).reshape(-1, len(CLIMATE_FIELDS))
+        rainfall, temperature, humidity, pH, organic_matter = (climate[:, [i]] for i in range(len(CLIMATE_FIELDS)))
+        soil_bits = np.array([[dataset.soil_bit(soil_type)] for soil_type in soil_types], dtype=np.int64)
+        
+        # نفس نقاط وترتيب جمع _calculate_compatibility
+        score = np.where(
+            (req['rainfall_min'] <= rainfall) & (rainfall <= req['rainfall_max']), 0.25,
+            np.where(np.abs(rainfall - req['rainfall_min']) < 50, 0.25 * 0.5, 0.0)
+        )
+        score = score + np.where(
+            (req['temperature_min'] <= temperature) & (temperature <= req['temperature_max']), 0.25,
+            np.where(np.abs(temperature - req['temperature_min']) < 10, 0.25 * 0.6, 0.0)
+        )
+        score = score + np.where((req['humidity_min'] <= humidity) & (humidity <= req['humidity_max']), 0.15, 0.0)
+        score = score + np.where((req['pH_min'] <= pH) & (pH <= req['pH_max']), 0.15, 0.0)
+        score = score + np.where(dataset.soil_masks & soil_bits, 0.20, 0.0)
+        compatibility = np.minimum(score, 1.0)
+        
+        # الخصائص: أعمدة المناخ لكل موسم مكررة لكل شجرة، وترميز نوع الشجرة لكل موسم
+        n_seasons, n_trees = compatibility.shape
+        tree_types = np.array([self._encode_tree_type(tree['type']) for tree in self.trees_db['trees']])
+        soil_codes = np.array([self._encode_soil_type(soil_type) for soil_type in soil_types])
+        per_season = np.column_stack([
+            rainfall[:, 0], temperature[:, 0], humidity[:, 0], soil_codes, pH[:, 0], organic_matter[:, 0],
+            season_codes
+        ])
+        X = np.column_stack([
+            np.repeat(per_season, n_trees, axis=0),
+            np.tile(tree_types, n_seasons)
+        ]).astype(np.float64)
+        y = (compatibility.ravel() >= 0.7).astype(int)
+        
+        return X, y
     
     def predict_success(self, governorate, season, tree_name, custom_params=None):
         """
@@ -131,23 +226,209 @@ class TreeSuccessPredictor:
         Returns:
             dict: نسبة النجاح، التوصيات، ملاحظات الموسم
         """
-        # الحصول على بيانات الموسم للمحافظة
-        season_data = self._get_season_data(governorate, season)
-        tree_info = self._get_tree_info(tree_name)
+        return self.predict_many([{
+            'governorate': governorate,
+            'season': season,
+            'tree_name': tree_name,
+            'custom_params': custom_params
+        }])[0]
+    
+    def predict_many(self, requests):
+        """
+        التنبؤ لعدة طلبات دفعة واحدة
+        يبني مصفوفة خصائص واحدة ويطبعها مرة واحدة ويستدعي predict_proba مرة لكل نموذج
         
-        if not season_data or not tree_info:
-            return {
-                'success_rate': 0,
-                'recommendations': ['بيانات غير متوفرة'],
-                'seasonal_notes': []
-            }
+        Args:
+            requests: قائمة قواميس تحتوي governorate و season و tree_name و custom_params (اختياري)
+        
+        Returns:
+            list: النتائج بنفس ترتيب الطلبات
+        """
+        results = [None] * len(requests)
+        rows = []
+        features = []
+        cache_keys = []
+        timer = timing.Stage()
+        
+        for i, req in enumerate(requests):
+            # الطلبات بدون معايير مخصصة تُجاب من الأطلس مباشرة
+            if not req.get('custom_params'):
+                cell = self.lookup_atlas(req['governorate'], req['season'], req['tree_name'])
+                metrics.CACHE_REQUESTS.inc('atlas', 'hit' if cell else 'miss')
+                if cell:
+                    results[i] = cell
+                    timer.add('lookup')
+                    continue
+            
+            # رفض الأسماء غير المعروفة قبل بناء الخصائص
+            season = req['season']
+            tree_info = self._get_tree_info(req['tree_name'])
+            gov_entry = self.catalog.get_governorate(req['governorate']) if tree_info else None
+            season_data = self._get_season_data(gov_entry[0], season) if gov_entry else None
+            timer.add('lookup')
+            
+            if not season_data or not tree_info:
+                results[i] = self._empty_result()
+                continue
+            
+            # استخدام المعايير المخصصة إذا وُجدت: التكميم لمفتاح الذاكرة فقط،
+            # والنتيجة تُبنى دائماً من القيم المدخلة كما هي
+            cache_key = None
+            if req.get('custom_params'):
+                season_data.update(req['custom_params'])
+                cache_key = self.cache.make_key(
+                    gov_entry[0], season, tree_info['name'], self.cache.quantize(req['custom_params'])
+                )
+                # الذاكرة تحفظ نسبة النجاح من النموذج، والتوصيات والبيانات المناخية من قيم الطلب
+                cached_rate = self.cache.get(cache_key) if cache_key else None
+                metrics.CACHE_REQUESTS.inc('prediction', 'miss' if cached_rate is None else 'hit')
+                timer.add('cache')
+                if cached_rate is not None:
+                    results[i] = self._build_result(tree_info, season, season_data, cached_rate)
+                    timer.add('recommendations')
+                    continue
+            
+            rows.append((i, req, season_data, tree_info))
+            cache_keys.append(cache_key)
+            features.append(self._build_features(season_data, season, tree_info))
+            timer.add('encode')
+        
+        timer.flush()
+        if rows:
+            features = np.array(features)
+            timer.lap('encode')
+            # التطبيع والنموذجان يُسجلون مراحلهم بأنفسهم
+            success_rates = self._predict_success_rates(
+                features, [(tree_info, season_data) for _, _, season_data, tree_info in rows]
+            )
+            timer.skip()
+            for (i, req, season_data, tree_info), cache_key, success_rate in zip(rows, cache_keys, success_rates):
+                results[i] = self._build_result(tree_info, req['season'], season_data, success_rate)
+                if cache_key:
+                    self.cache.put(cache_key, success_rate)
+            timer.lap('recommendations')
+        
+        return results
+    
+    def _on_model_ready(self, engine=None):
+        """
+        تجهيز المحرك والأطلس بعد تحميل أو تدريب النموذج
         
-        # استخدام المعايير المخصصة إذا وُجدت
-        if custom_params:
-            season_data.update(custom_params)
+        Args:
+            engine: محرك مُجمّع محمّل من القرص (اختياري)
+        """
+        self.cache.clear()
+        self.engine = engine
+        if self.engine is None and config.INFERENCE_ENGINE == 'compiled':
+            self.engine = self._compile_engine()
+        self._build_atlas()
+    
+    def _compile_engine(self):
+        """
+        بناء المحرك المُجمّع والتحقق من مطابقته لمخرجات sklearn
+        يُرجع None (والعودة إلى sklearn) عند عدم المطابقة
+        """
+        engine = CompiledEnsemble.from_sklearn(self.rf_model, self.gb_model, self.scaler)
+        
+        X_check = self._parity_inputs()
+        X_check_scaled = self.scaler.transform(X_check)
+        rf_prob, gb_prob = engine.predict_proba(X_check)
+        rf_error = np.abs(rf_prob - self.rf_model.predict_proba(X_check_scaled)[:, 1]).max()
+        gb_error = np.abs(gb_prob - self.gb_model.predict_proba(X_check_scaled)[:, 1]).max()
+        
+        if max(rf_error, gb_error) > 1e-6:
+            print(f"⚠️ المحرك المُجمّع لا يطابق sklearn (RF: {rf_error:.2e}, GB: {gb_error:.2e})، سيُستخدم sklearn")
+            return None
+        return engine
+    
+    def _parity_inputs(self, count=2000, seed=0):
+        """
+        مدخلات التحقق من مطابقة المحرك: شبكة التدريب، وصفوف عشوائية ضمن نطاق كل خاصية،
+        ونفس الصفوف مقرّبة (كمعايير الواجهة المخصصة) لتقع على قيم الشبكة وعتباتها أو قربها
+        """
+        X_grid, _ = self._generate_training_data()
+        rng = np.random.default_rng(seed)
+        low, high = X_grid.min(axis=0), X_grid.max(axis=0)
+        X_random = rng.uniform(low - 0.1 * (high - low), high + 0.1 * (high - low), size=(count, X_grid.shape[1]))
+        # الخصائص المرمّزة (التربة، الفصل، نوع الشجرة) أعداد صحيحة
+        X_random[:, CATEGORICAL_FEATURES] = np.round(X_random[:, CATEGORICAL_FEATURES])
+        X_quantized = np.round(X_random * 2) / 2
+        return np.vstack([X_grid, X_random, X_quantized])
+    
+    def _build_atlas(self):
+        """
+        حساب أطلس النجاح لكل محافظة × فصل × شجرة في تمريرة واحدة
+        يُستدعى عند تحميل أو تدريب النموذج
+        """
+        cells = []
+        features = []
         
-        # تحضير البيانات للتنبؤ
-        features = np.array([[
+        for gov_name_ar in self.climate_db['governorates']:
+            for season in SEASON_MAPPING:
+                season_data = self._get_season_data(gov_name_ar, season)
+                if not season_data:
+                    continue
+                
+                for tree in self.trees_db['trees']:
+                    cells.append((gov_name_ar, season, tree, season_data))
+                    features.append(self._build_features(season_data, season, tree))
+        
+        atlas = {}
+        if cells:
+            success_rates = self._predict_success_rates(
+                np.array(features), [(tree, season_data) for _, _, tree, season_data in cells]
+            )
+            for (gov_name_ar, season, tree, season_data), success_rate in zip(cells, success_rates):
+                # كل خلية تحمل نسختها الخاصة من البيانات المناخية
+                atlas[(gov_name_ar, season, tree['name'])] = self._build_result(
+                    tree, season, dict(season_data), success_rate
+                )
+        
+        self.atlas = atlas
+        return len(cells)
+    
+    def lookup_atlas(self, governorate, season, tree_name):
+        """البحث عن نتيجة محسوبة مسبقاً (None إذا لم تكن موجودة)"""
+        gov_entry = self.catalog.get_governorate(governorate)
+        tree = self.catalog.get_tree(tree_name)
+        if not gov_entry or not tree:
+            return None
+        
+        cell = self.atlas.get((gov_entry[0], season, tree['name']))
+        return dict(cell) if cell else None
+    
+    def recommend_trees(self, governorate, season, limit=5):
+        """
+        ترتيب الأشجار حسب نسبة النجاح المتوقعة من النموذج لمحافظة وموسم
+        
+        Returns:
+            list: الشجرة ونسبة النجاح ودرجة التوافق، بالترتيب التنازلي لنسبة النجاح
+        """
+        trees = self.trees_db['trees']
+        results = self.predict_many([
+            {'governorate': governorate, 'season': season, 'tree_name': tree['name']}
+            for tree in trees
+        ])
+        success_rates = [result['success_rate'] for result in results]
+        
+        return [
+            {'tree': tree, 'success_rate': success_rate, 'compatibility': compatibility}
+            for tree, compatibility, success_rate in self.recommender.recommend(
+                governorate, season, limit, scores=success_rates
+            )
+        ]
+    
+    def _empty_result(self):
+        """نتيجة عند عدم توفر بيانات المحافظة أو الشجرة"""
+        return {
+            'success_rate': 0,
+            'recommendations': ['بيانات غير متوفرة'],
+            'seasonal_notes': []
+        }
+    
+    def _build_features(self, season_data, season, tree_info):
+        """تحضير صف الخصائص للتنبؤ"""
+        return [
             season_data['rainfall'],
             season_data['temperature_avg'],
             season_data['humidity'],
@@ -156,32 +437,59 @@ class TreeSuccessPredictor:
             season_data['organic_matter'],
             self._encode_season(season),
             self._encode_tree_type(tree_info['type'])
-        ]])
-        
-        features_scaled = self.scaler.transform(features)
+        ]
+    
+    def _predict_success_rates(self, features, pairs):
+        """
+        حساب نسب النجاح لمصفوفة خصائص كاملة
         
+        Args:
+            features: مصفوفة الخصائص (صف لكل طلب)
+            pairs: قائمة (tree_info, season_data) لكل صف للحساب اليدوي
+        """
         # التنبؤ باستخدام النماذج
-        if self.rf_model and self.gb_model:
-            rf_prob = self.rf_model.predict_proba(features_scaled)[0][1]
-            gb_prob = self.gb_model.predict_proba(features_scaled)[0][1]
-            success_rate = (rf_prob + gb_prob) / 2 * 100
-        else:
-            # حساب يدوي إذا لم يكن النموذج مدرباً
-            success_rate = self._calculate_compatibility(tree_info, season_data) * 100
+        if self.engine:
+            # المحرك المُجمّع يعمل على الخصائص الخام (يطبّعها بنفسه كما يفعل scaler)
+            rf_prob = self._timed_proba('rf', 'compiled', self.engine.rf_proba, features)
+            gb_prob = self._timed_proba('gb', 'compiled', self.engine.gb_proba, features)
+            return ((rf_prob + gb_prob) / 2 * 100).tolist()
         
+        if self.rf_model and self.gb_model:
+            started = time.perf_counter()
+            features_scaled = self.scaler.transform(features)
+            timing.record('scale', time.perf_counter() - started)
+            rf_prob = self._timed_proba('rf', 'sklearn', self.rf_model.predict_proba, features_scaled)[:, 1]
+            gb_prob = self._timed_proba('gb', 'sklearn', self.gb_model.predict_proba, features_scaled)[:, 1]
+            return ((rf_prob + gb_prob) / 2 * 100).tolist()
+        
+        # حساب يدوي إذا لم يكن النموذج مدرباً
+        return [self._calculate_compatibility(tree_info, season_data) * 100
+                for tree_info, season_data in pairs]
+    
+    def _timed_proba(self, model, engine, predict_proba, features):
+        """استدعاء predict_proba لنموذج واحد مع تسجيل زمنه (في المقاييس ومراحل الطلب)"""
+        started = time.perf_counter()
+        probabilities = predict_proba(features)
+        elapsed = time.perf_counter() - started
+        metrics.MODEL_PREDICT_DURATION.observe(elapsed, model, engine)
+        timing.record(model, elapsed)
+        return probabilities
+    
+    def _build_result(self, tree_info, season, season_data, success_rate):
+        """تجميع نتيجة التنبؤ مع التوصيات والملاحظات"""
         # توليد التوصيات
         recommendations = self._generate_recommendations(
             tree_info, season_data, season, success_rate
         )
         
         # ملاحظات الموسم
-        seasonal_notes = self._get_seasonal_notes(tree_name, season)
+        seasonal_notes = self._get_seasonal_notes(tree_info, season)
         
         return {
             'success_rate': round(success_rate, 1),
             'recommendations': recommendations,
             'seasonal_notes': seasonal_notes,
-            'optimal_planting_time': self._get_optimal_planting_time(tree_name),
+            'optimal_planting_time': self._get_optimal_planting_time(tree_info),
             'tree_info': tree_info,
             'climate_data': season_data
         }
@@ -229,35 +537,11 @@ class TreeSuccessPredictor:
     
     def _get_season_data(self, governorate, season):
         """الحصول على بيانات الموسم للمحافظة"""
-        season_mapping = {
-            'spring': 'الربيع',
-            'summer': 'الصيف',
-            'autumn': 'الخريف',
-            'winter': 'الشتاء'
-        }
-        
-        season_ar = season_mapping.get(season, season)
-        
-        for gov_name_ar, gov_data in self.climate_db['governorates'].items():
-            if gov_name_ar == governorate or gov_data.get('name_en', '').lower() == governorate.lower():
-                if season_ar in gov_data:
-                    raw_data = gov_data[season_ar]
-                    return {
-                        'rainfall': raw_data.get('rainfall_mm', 50),
-                        'temperature_avg': raw_data.get('avg_temperature', 25),
-                        'humidity': raw_data.get('humidity', 50),
-                        'soil_type': raw_data.get('soil_type', 'رملية'),
-                        'pH': raw_data.get('soil_ph', 7.5),
-                        'organic_matter': raw_data.get('organic_matter', 2.0)
-                    }
-        return None
+        return self.catalog.get_season_data(governorate, season)
     
     def _get_tree_info(self, tree_name):
         """الحصول على معلومات الشجرة"""
-        for tree in self.trees_db['trees']:
-            if tree['name'] == tree_name or tree['name_en'].lower() == tree_name.lower():
-                return tree
-        return None
+        return self.catalog.get_tree(tree_name)
     
     def _encode_soil_type(self, soil_type):
         """ترميز نوع التربة"""
@@ -319,20 +603,13 @@ class TreeSuccessPredictor:
         
         return recommendations
     
-    def _get_seasonal_notes(self, tree_name, season):
+    def _get_seasonal_notes(self, tree, season):
         """الحصول على ملاحظات الموسم للشجرة"""
-        tree = self._get_tree_info(tree_name)
-        if not tree:
-            return []
-        
         seasonal_tips = tree.get('seasonal_care', {})
         return seasonal_tips.get(season, [])
     
-    def _get_optimal_planting_time(self, tree_name):
+    def _get_optimal_planting_time(self, tree):
         """الحصول على أفضل وقت للزراعة"""
-        tree = self._get_tree_info(tree_name)
-        if not tree:
-            return "غير محدد"
         return tree.get('optimal_planting_time', 'الخريف والشتاء')
     
     def get_all_trees(self):
@@ -341,34 +618,140 @@ class TreeSuccessPredictor:
     
     def get_all_governorates(self):
         """الحصول على قائمة بجميع المحافظات"""
-        return list(self.climate_db['governorates'].keys())
-    
-    def save_model(self, path='models/'):
-        """حفظ النموذج المدرب"""
-        Path(path).mkdir(exist_ok=True)
-        if self.rf_model:
-            joblib.dump(self.rf_model, f'{path}rf_model.pkl')
-        if self.gb_model:
-            joblib.dump(self.gb_model, f'{path}gb_model.pkl')
-        joblib.dump(self.scaler, f'{path}scaler.pkl')
+        return self.catalog.get_governorate_names()
+    
+    def _after_fork(self):
+        """
+        إعادة تهيئة القفل في العمليات الفرعية (مجمّع العمليات)
+        قد يكون القفل محجوزاً من خيط التحميل لحظة التفرع فتتوقف العملية الفرعية للأبد
+        """
+        self._load_lock = threading.Lock()
+        if self.status == 'loading':
+            self.status = 'not_loaded'
+    
+    @property
+    def is_ready(self):
+        """هل النموذج المدرب محمّل وجاهز للتنبؤ"""
+        return self.status == 'ready'
+    
+    def ensure_loaded(self):
+        """
+        تحميل النموذج عند أول حاجة إليه (مرة واحدة فقط)
+        لا يقوم بالتدريب أبداً: عند غياب الملفات تبقى الحالة failed ويُستخدم الحساب اليدوي
+        """
+        if self.status in ('ready', 'failed'):
+            return self.is_ready
+        
+        with self._load_lock:
+            if self.status in ('not_loaded', 'loading'):
+                self.status = 'loading'
+                if not self.load_model():
+                    self.status = 'failed'
+                    print(f"⚠️ تعذر تحميل النموذج من {config.MODEL_DIR}: {self.load_error}")
+        return self.is_ready
+    
+    def model_memory(self):
+        """ذاكرة النموذج في هذه العملية (للعرض في /health)"""
+        if self.engine:
+            return {
+                'engine': 'compiled-mmap' if self.engine.is_mapped else 'compiled',
+                'model_bytes': self.engine.nbytes,
+                'shared_across_workers': self.engine.is_mapped
+            }
+        
+        model_bytes = 0
+        if self.rf_model and self.gb_model:
+            trees = [e.tree_ for e in self.rf_model.estimators_] + [e.tree_ for e in self.gb_model.estimators_[:, 0]]
+            model_bytes = sum(t.__getstate__()['nodes'].nbytes + t.value.nbytes for t in trees)
+        return {
+            'engine': 'sklearn' if model_bytes else 'none',
+            'model_bytes': model_bytes,
+            'shared_across_workers': False
+        }
+    
+    def save_model(self, path=None):
+        """
+        حفظ النموذج المدرب
+        
+        Returns:
+            bool: False إذا لم يكن في الذاكرة نموذج يُحفظ (لا نماذج sklearn ولا محرك مُجمّع)
+        """
+        has_sklearn = self.rf_model is not None and self.gb_model is not None
+        if not has_sklearn and self.engine is None:
+            print("⚠️ لا يوجد نموذج محمّل للحفظ")
+            return False
+        
+        path = Path(path or config.MODEL_DIR)
+        path.mkdir(parents=True, exist_ok=True)
+        # إبطال المحرك السابق قبل استبدال النماذج: load_model لا يستخدم المحرك بدون meta.json
+        (path / 'engine' / 'meta.json').unlink(missing_ok=True)
+        if has_sklearn:
+            _atomic_dump(self.rf_model, path / 'rf_model.pkl')
+            _atomic_dump(self.gb_model, path / 'gb_model.pkl')
+            engine = self._compile_engine()
+        else:
+            # محمّل من المحرك وحده: ملفات pkl تبقى كما هي ويُعاد حفظ المحرك نفسه
+            engine = self.engine
+        _atomic_dump(self.scaler, path / 'scaler.pkl')
+        
+        # مصفوفات المحرك المُجمّع (npy غير مضغوطة) لتحميلها بـ mmap ومشاركتها بين العمليات
+        if engine:
+            engine.save(path / 'engine')
+        else:
+            # مصفوفات محرك قديم لا تطابق النماذج المحفوظة (العمليات التي عيّنتها تحتفظ بنسختها)
+            shutil.rmtree(path / 'engine', ignore_errors=True)
         return True
     
-    def load_model(self, path='models/'):
+    def load_model(self, path=None):
         """تحميل النموذج المحفوظ"""
+        path = Path(path or config.MODEL_DIR)
         try:
-            self.rf_model = joblib.load(f'{path}rf_model.pkl')
-            self.gb_model = joblib.load(f'{path}gb_model.pkl')
-            self.scaler = joblib.load(f'{path}scaler.pkl')
-            return True
-        except:
+            engine = self._load_engine(path)
+            if engine:
+                # المحرك المُجمّع يكفي وحده: لا حاجة لفك نماذج sklearn في كل عملية
+                self.rf_model = None
+                self.gb_model = None
+                self.scaler = joblib.load(path / 'scaler.pkl')
+                self._on_model_ready(engine)
+            else:
+                self.rf_model = joblib.load(path / 'rf_model.pkl')
+                self.gb_model = joblib.load(path / 'gb_model.pkl')
+                self.scaler = joblib.load(path / 'scaler.pkl')
+                self._on_model_ready()
+        except Exception as e:
+            self.rf_model = None
+            self.gb_model = None
+            self.scaler = StandardScaler()
+            self.engine = None
+            self.atlas = {}
+            self.load_error = str(e)
             return False
+        
+        self.status = 'ready'
+        self.load_error = None
+        return True
+    
+    def _load_engine(self, path):
+        """
+        المحرك المُجمّع المحفوظ (معيّن في الذاكرة)، أو None إذا لم يكن مفعّلاً أو محفوظاً
+        المحرك المحفوظ بصيغة أقدم يُتجاهل ويُعاد بناؤه من نماذج sklearn
+        """
+        if config.INFERENCE_ENGINE != 'compiled' or not (path / 'engine' / 'meta.json').exists():
+            return None
+        try:
+            return CompiledEnsemble.load(path / 'engine', mmap_mode='r')
+        except ValueError as e:
+            print(f"⚠️ {e}، سيُعاد بناء المحرك من نماذج sklearn")
+            return None
 
-# تهيئة النموذج العام
+# تهيئة النموذج العام (التحميل كسول: عند بدء الخادم أو أول تنبؤ)
 predictor = TreeSuccessPredictor()
 
-# محاولة تحميل نموذج محفوظ، وإلا تدريب نموذج جديد
-if not predictor.load_model():
+if __name__ == "__main__":
+    # تدريب نموذج جديد وحفظه: python -m backend.app.ml_model
     print("⚙️ تدريب نموذج جديد...")
     predictor.train_initial_model()
+    for phase, seconds in predictor.training_times.items():
+        print(f"   {phase}: {seconds:.3f} s")
     predictor.save_model()
-    print("✅ اكتمل التدريب")
+    print(f"✅ اكتمل التدريب وحُفظ النموذج في {config.MODEL_DIR}")
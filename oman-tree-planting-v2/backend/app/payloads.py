@@ -0,0 +1,151 @@
+"""
+استجابات JSON المسلسلة مسبقاً
+تُسلسل بيانات الكتالوج (الأشجار والمحافظات) مرة واحدة كبايتات مع ETag قوي
+ونسخ مضغوطة جاهزة، ولا يُعاد توليدها إلا عند إعادة تحميل البيانات
+"""
+
+import hashlib
+import json
+
+from backend.app.compression import negotiate, precompress
+
+try:
+    import orjson
+except ImportError:  # orjson اختياري: json القياسي بنفس التنسيق
+    orjson = None
+
+
+def dumps(value):
+    """تسلسل JSON كبايتات بنفس تنسيق FastAPI (JSONResponse)، بـ orjson إن توفر"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class StaticPayload:
+    """جسم استجابة ثابت مع ETag قوي مشتق من محتواه، ونسخه المضغوطة مسبقاً"""
+
+    __slots__ = ('body', 'etag', 'encoded')
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        # الترميز -> البايتات المضغوطة (فارغ إذا كان الجسم أصغر من حد الضغط)
+        self.encoded = precompress(body)
+
+    def select(self, accept_encoding):
+        """
+        النسخة المناسبة لترويسة Accept-Encoding
+
+        Returns:
+            tuple: (الجسم، الترميز أو None، ETag) - لكل ترميز ETag مختلف لأن البايتات مختلفة
+        """
+        encoding = negotiate(accept_encoding) if self.encoded else None
+        if encoding is None:
+            return self.body, None, self.etag
+        return self.encoded[encoding], encoding, self.etag[:-1] + '-' + encoding + '"'
+
+    @classmethod
+    def from_value(cls, value):
+        """تسلسل القيمة وإنشاء الاستجابة"""
+        return cls(dumps(value))
+
+    def matches(self, if_none_match):
+        """هل تطابق ترويسة If-None-Match هذا المحتوى (مقارنة ضعيفة كما في RFC 9110)"""
+        if not if_none_match:
+            return False
+
+        # أي نسخة من نفس المحتوى (مضغوطة أو لا) تكفي للتحقق
+        etags = {self.etag} | {self.etag[:-1] + '-' + encoding + '"' for encoding in self.encoded}
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag == '*' or tag.removeprefix('W/') in etags:
+                return True
+        return False
+
+
+class CatalogPayloads:
+    """استجابات /api/trees و /api/trees/{name} و /api/governorates جاهزة لفهرس واحد"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        trees = catalog.dataset.trees
+        governorates = catalog.get_governorate_names()
+
+        self.trees = StaticPayload.from_value({'success': True, 'count': len(trees), 'data': trees})
+        self.governorates = StaticPayload.from_value(
+            {'success': True, 'count': len(governorates), 'data': governorates}
+        )
+        # id(سجل الشجرة) -> الاستجابة (الفهرس يربط الاسم العربي والإنجليزي بنفس السجل)
+        self._tree_payloads = {
+            id(tree): StaticPayload.from_value({'success': True, 'data': tree}) for tree in trees
+        }
+        # صفحات القائمة المطلوبة سابقاً: (الحقول، النوع، الحد، المؤشر) -> الاستجابة
+        self._tree_pages = {}
+
+    def tree(self, name):
+        """استجابة شجرة واحدة بالاسم العربي أو الإنجليزي (None إذا لم توجد)"""
+        tree = self.catalog.get_tree(name)
+        return self._tree_payloads.get(id(tree)) if tree else None
+
+    def tree_page(self, fields=None, tree_type=None, limit=None, cursor=None):
+        """
+        قائمة أشجار مع اختيار الحقول والتصفية بالنوع والتقسيم إلى صفحات
+
+        Args:
+            fields: أسماء الحقول مفصولة بفواصل (الافتراضي: جميع الحقول)
+            tree_type: نوع الشجرة (عبر فهرس الأنواع)
+            limit: عدد الأشجار في الصفحة
+            cursor: مؤشر الصفحة من next_cursor في الاستجابة السابقة
+
+        Raises:
+            ValueError: حقل غير معروف أو حد أو مؤشر غير صالح
+        """
+        key = (fields, tree_type, limit, cursor)
+        payload = self._tree_pages.get(key)
+        if payload is not None:
+            return payload
+
+        selected = None
+        if fields:
+            selected = tuple(dict.fromkeys(name.strip() for name in fields.split(',') if name.strip()))
+            unknown = [name for name in selected if name not in self.catalog.tree_fields]
+            if unknown:
+                raise ValueError(f"حقول غير معروفة: {', '.join(unknown)}")
+
+        if limit is not None and limit < 1:
+            raise ValueError("limit يجب أن يكون 1 أو أكثر")
+        try:
+            start = int(cursor) if cursor else 0
+        except ValueError:
+            raise ValueError("مؤشر غير صالح") from None
+
+        indices = self.catalog.get_tree_indices(tree_type)
+        if not 0 <= start <= len(indices):
+            raise ValueError("مؤشر غير صالح")
+        end = len(indices) if limit is None else min(start + limit, len(indices))
+
+        trees = self.catalog.dataset.trees
+        page = [trees[i] for i in indices[start:end]]
+        if selected:
+            page = [{name: tree[name] for name in selected if name in tree} for tree in page]
+
+        payload = StaticPayload.from_value({
+            'success': True,
+            'count': len(page),
+            'total': len(indices),
+            'next_cursor': str(end) if end < len(indices) else None,
+            'data': page
+        })
+
+        # الصفحات محدودة العدد؛ تُفرّغ عند الامتلاء وتُبنى من جديد عند الطلب
+        if len(self._tree_pages) >= 256:
+            self._tree_pages.clear()
+        self._tree_pages[key] = payload
+        return payload
+
+    @property
+    def nbytes(self):
+        """حجم الاستجابات المسلسلة بالبايت (مع النسخ المضغوطة)"""
+        payloads = [self.trees, self.governorates, *self._tree_payloads.values()]
+        return sum(len(payload.body) + sum(map(len, payload.encoded.values())) for payload in payloads)
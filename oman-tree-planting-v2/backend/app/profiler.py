@@ -0,0 +1,118 @@
+"""
+مُحلّل أداء بأخذ العينات
+خيط خلفي يلتقط مكدسات جميع الخيوط كل فترة قصيرة ويجمعها بصيغة المكدسات المطوية
+(folded stacks) المتوافقة مع flamegraph.pl و speedscope، ولا تكلفة له وهو متوقف
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+
+def _frame_label(frame):
+    """اسم الإطار: الملف:الدالة"""
+    code = frame.f_code
+    return f'{os.path.basename(code.co_filename).removesuffix(".py")}:{code.co_name}'
+
+
+class SamplingProfiler:
+    """تشغيل وإيقاف أخذ العينات أثناء عمل الخادم"""
+
+    def __init__(self, output, interval_ms=10.0):
+        """
+        Args:
+            output: مسار ملف المكدسات المطوية
+            interval_ms: الفترة بين العينات (ملي ثانية)
+        """
+        self.output = output
+        self.interval_ms = interval_ms
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.samples = 0
+        self.started_at = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, interval_ms=None):
+        """
+        بدء أخذ العينات (يبدأ تجميعاً جديداً)
+
+        Returns:
+            bool: False إذا كان يعمل مسبقاً
+        """
+        with self._lock:
+            if self._thread is not None:
+                return False
+            if interval_ms:
+                self.interval_ms = interval_ms
+            self._stacks = Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample, name='profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """
+        إيقاف أخذ العينات وكتابة الملف
+
+        Returns:
+            dict: حالة المُحلّل بعد الإيقاف
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+            self.dump()
+        return self.stats()
+
+    def _sample(self):
+        """حلقة أخذ العينات (تتجاهل خيط المُحلّل نفسه)"""
+        own_id = threading.get_ident()
+        interval = self.interval_ms / 1000
+        while not self._stop.wait(interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self._stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def dump(self):
+        """كتابة المكدسات المطوية (سطر لكل مكدس: الإطارات مفصولة بـ ; ثم العدد) بشكل ذري"""
+        lines = [f'{stack} {count}\n' for stack, count in self._stacks.most_common()]
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.output.parent, prefix=f'.{self.output.name}.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+            os.replace(tmp_path, self.output)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def stats(self):
+        """حالة المُحلّل"""
+        return {
+            'running': self.running,
+            'interval_ms': self.interval_ms,
+            'samples': self.samples,
+            'stacks': len(self._stacks),
+            'started_at': self.started_at,
+            'output': str(self.output)
+        }
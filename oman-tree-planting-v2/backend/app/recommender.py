@@ -0,0 +1,141 @@
+"""
+محرك توصيات الأشجار
+يحسب توافق جميع الأشجار مع مناخ واحد بتعبير متجهي على مصفوفات المتطلبات
+وأقنعة بتات التربة، ويختار أفضل k باختيار جزئي بدلاً من ترتيب القائمة كاملة
+"""
+
+import numpy as np
+
+from backend.app.catalog import get_catalog
+
+
+def top_k(scores, k, min_score=None):
+    """
+    أرقام أعلى k قيم بترتيب تنازلي (عند التساوي يأتي الأسبق أولاً)
+
+    Args:
+        scores: مصفوفة الدرجات
+        k: عدد النتائج المطلوبة
+        min_score: تُستبعد الدرجات التي لا تتجاوزه (اختياري)
+    """
+    candidates = np.arange(len(scores)) if min_score is None else np.flatnonzero(scores > min_score)
+    if k <= 0:
+        return candidates[:0]
+
+    if k < len(candidates):
+        # اختيار جزئي: القيمة رقم k ثم ما فوقها وأسبق المتساويين معها
+        values = scores[candidates]
+        kth = np.partition(values, len(values) - k)[len(values) - k]
+        above = candidates[values > kth]
+        ties = candidates[values == kth][:k - len(above)]
+        candidates = np.concatenate([above, ties])
+
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+# (الحقل في بيانات الموسم، حقل الحد الأدنى، حقل الحد الأقصى، نقاط داخل المدى، مسافة القرب من الحد الأدنى، نقاط القرب)
+COMPATIBILITY_RULES = (
+    ('rainfall', 'rainfall_min', 'rainfall_max', 0.3, 50, 0.15),
+    ('temperature_avg', 'temperature_min', 'temperature_max', 0.3, 10, 0.15),
+    ('humidity', 'humidity_min', 'humidity_max', 0.2, 0, 0.0)
+)
+
+# نقاط تطابق نوع التربة
+SOIL_POINTS = 0.2
+
+
+class TreeRecommender:
+    """ترتيب الأشجار لمحافظة وموسم"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.dataset = catalog.dataset
+
+        # مصفوفات (عدد القواعد، عدد الأشجار) للحدود، و(عدد القواعد، 1) للنقاط
+        req = self.dataset.requirements
+        self._mins = np.stack([req[rule[1]] for rule in COMPATIBILITY_RULES])
+        self._maxs = np.stack([req[rule[2]] for rule in COMPATIBILITY_RULES])
+        self._in_points = np.array([[rule[3]] for rule in COMPATIBILITY_RULES])
+        self._near_distance = np.array([[rule[4]] for rule in COMPATIBILITY_RULES])
+        self._near_points = np.array([[rule[5]] for rule in COMPATIBILITY_RULES])
+
+    def compatibility(self, climate):
+        """
+        توافق جميع الأشجار مع بيانات موسم واحد (نفس أوزان الـ Chatbot)
+
+        Args:
+            climate: بيانات الموسم كما يُرجعها الفهرس
+
+        Returns:
+            np.ndarray: درجة التوافق لكل شجرة بترتيب قاعدة البيانات
+        """
+        return self.compatibility_matrix([climate])[0]
+
+    def compatibility_matrix(self, climates):
+        """
+        توافق جميع الأشجار مع عدة مواسم في تعبير متجهي واحد
+
+        Args:
+            climates: قائمة بيانات المواسم
+
+        Returns:
+            np.ndarray: مصفوفة (عدد المواسم، عدد الأشجار)
+        """
+        # (عدد المواسم، عدد القواعد، 1) مقابل حدود (عدد القواعد، عدد الأشجار)
+        values = np.array(
+            [[[climate[rule[0]]] for rule in COMPATIBILITY_RULES] for climate in climates],
+            dtype=np.float64
+        )
+        soil_bits = np.array(
+            [[self.dataset.soil_bit(climate['soil_type'])] for climate in climates], dtype=np.int64
+        )
+
+        # نقاط كل قاعدة: داخل المدى، وإلا قريب من الحد الأدنى، وإلا صفر
+        in_range = (self._mins <= values) & (values <= self._maxs)
+        near = np.abs(values - self._mins) < self._near_distance
+        points = np.where(in_range, self._in_points, np.where(near, self._near_points, 0.0))
+
+        # الجمع بنفس ترتيب الحساب الأصلي: الأمطار، الحرارة، الرطوبة، التربة
+        score = points[:, 0] + points[:, 1] + points[:, 2]
+        score += np.where(self.dataset.soil_masks & soil_bits, SOIL_POINTS, 0.0)
+
+        return np.minimum(score, 1.0)
+
+    def recommend(self, governorate, season, limit=5, scores=None, min_score=None):
+        """
+        أفضل الأشجار لمحافظة وموسم
+
+        Args:
+            governorate: اسم المحافظة
+            season: الفصل
+            limit: عدد النتائج
+            scores: درجات ترتيب بديلة لكل شجرة (مثل نسب نجاح النموذج)، وإلا يُرتب حسب التوافق
+            min_score: أدنى درجة ترتيب مقبولة (اختياري)
+
+        Returns:
+            list: (سجل الشجرة، درجة التوافق، درجة الترتيب) بالترتيب التنازلي
+        """
+        climate = self.catalog.get_season_data(governorate, season)
+        if not climate:
+            return []
+
+        compatibility = self.compatibility(climate)
+        ranking = compatibility if scores is None else np.asarray(scores, dtype=np.float64)
+
+        return [
+            (self.dataset.trees[i], float(compatibility[i]), float(ranking[i]))
+            for i in top_k(ranking, limit, min_score)
+        ]
+
+
+_recommender = None
+
+
+def get_recommender():
+    """محرك التوصيات المشترك للعملية"""
+    global _recommender
+    catalog = get_catalog()
+    if _recommender is None or _recommender.catalog is not catalog:
+        _recommender = TreeRecommender(catalog)
+    return _recommender
@@ -0,0 +1,123 @@
+"""
+إعادة التحميل الساخن للبيانات والنماذج
+تُبنى نسخة جديدة كاملة في الخلفية ثم تُستبدل دفعة واحدة،
+فتكمل الطلبات الجارية على النسخة القديمة ولا يتوقف الخادم أثناء البناء
+"""
+
+import threading
+import time
+
+
+class HotReloader:
+    """إعادة تحميل بطلب يدوي أو عند تغيّر الملفات المراقبة"""
+
+    def __init__(self, build, swap, watch_paths=None, interval=0):
+        """
+        Args:
+            build: دالة تبني النسخة الجديدة وتُرجعها (ترفع استثناء عند الفشل)
+            swap: دالة تستبدل النسخة الحالية بالجديدة
+            watch_paths: دالة تُرجع مسارات الملفات المراقبة (اختياري)
+            interval: فترة فحص الملفات بالثواني (0 لتعطيل المراقبة)
+        """
+        self._build = build
+        self._swap = swap
+        self._watch_paths = watch_paths
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.version = 0
+        self.in_progress = False
+        self.failures = 0
+        self.last_error = None
+        self.last_reload = None
+        self.last_duration_ms = None
+
+    def reload(self):
+        """
+        بناء نسخة جديدة واستبدالها (عملية واحدة في كل مرة)
+        عند الفشل تبقى النسخة الحالية كما هي
+
+        Returns:
+            bool: هل تم الاستبدال
+        """
+        with self._lock:
+            self.in_progress = True
+            started = time.perf_counter()
+            try:
+                services = self._build()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                print(f"⚠️ فشلت إعادة التحميل، تستمر النسخة الحالية: {e}")
+                return False
+            finally:
+                self.in_progress = False
+
+            self._swap(services)
+            self.version += 1
+            self.last_error = None
+            self.last_reload = time.time()
+            self.last_duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            print(f"🔄 أُعيد تحميل البيانات والنماذج (النسخة {self.version}) في {self.last_duration_ms} ms")
+            return True
+
+    def signature(self):
+        """بصمة الملفات المراقبة (المسار، وقت التعديل، الحجم)"""
+        if not self._watch_paths:
+            return ()
+
+        signature = []
+        for path in self._watch_paths():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def start(self):
+        """بدء مراقبة الملفات في خيط خلفي (إذا كانت مفعّلة)"""
+        if self.interval <= 0 or not self._watch_paths or self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='hot-reload', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """إيقاف مراقبة الملفات"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _watch(self):
+        """
+        فحص الملفات دورياً، وإعادة التحميل عندما تتغير ثم تستقر لفحصين متتاليين
+        (لتجنب قراءة ملف ما زال قيد الكتابة)
+        """
+        current = self.signature()
+        pending = None
+        while not self._stop.wait(self.interval):
+            signature = self.signature()
+            if signature == current:
+                pending = None
+            elif signature == pending:
+                current, pending = signature, None
+                self.reload()
+            else:
+                pending = signature
+
+    def stats(self):
+        """حالة إعادة التحميل"""
+        return {
+            'version': self.version,
+            'in_progress': self.in_progress,
+            'watching': self._thread is not None,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'last_reload': self.last_reload,
+            'last_duration_ms': self.last_duration_ms
+        }
@@ -0,0 +1,148 @@
+"""
+جداول الاستجابات المحسوبة مسبقاً لكل محافظة × فصل
+النصائح الموسمية والتوصيات تُحسب مرة واحدة وتُحفظ كـ JSON جاهز،
+وتُعاد بناؤها كاملة ثم تُستبدل دفعة واحدة عند تغيّر البيانات أو النموذج
+البناء يتم في الخلفية فقط (التحميل عند بدء الخادم وإعادة التحميل)، والطلبات تقرأ آخر نسخة مكتملة
+"""
+
+import threading
+
+from backend.app.catalog import SEASON_MAPPING
+from backend.app.payloads import StaticPayload, dumps
+
+
+class ResponseTables:
+    """النصائح الموسمية والتوصيات مسلسلة مسبقاً لكل (محافظة، فصل)"""
+
+    def __init__(self, chatbot, predictor):
+        self.chatbot = chatbot
+        self.predictor = predictor
+        # (النصائح، توصيات التوافق، توصيات النموذج) تُستبدل معاً كمرجع واحد
+        # المفتاح في كل جدول: (الاسم العربي، الفصل بالعربية)
+        # القيم: JSON النصيحة، أو قائمة JSON للتوصيات مرتبة
+        self._tables = ({}, {}, {})
+        # استجابات /api/predict من الأطلس مسلسلة ومضغوطة مسبقاً
+        # المفتاح: (الاسم العربي، الفصل كما في الأطلس، اسم الشجرة)
+        self._predictions = {}
+        # المصادر التي بُنيت منها الجداول الحالية (للكشف عن التغيير)
+        self._catalog = None
+        self._atlas = None
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def _key(self, governorate, season):
+        """مفتاح الجدول من الاسم المدخل (None لأسماء غير معروفة)"""
+        gov_entry = self.chatbot.catalog.get_governorate(governorate)
+        season_ar = SEASON_MAPPING.get(season, season)
+        if not gov_entry or season_ar not in SEASON_MAPPING.values():
+            return None
+        return (gov_entry[0], season_ar)
+
+    def refresh(self, wait=False):
+        """
+        إعادة البناء فقط إذا تغيّر الفهرس أو أطلس النموذج منذ آخر بناء
+        لا تُستدعى من مسار الطلبات: بناء جداول النموذج يسلسل ويضغط مئات الاستجابات
+
+        Args:
+            wait: انتظار بناء جارٍ في خيط آخر (وإلا تُستخدم الجداول الحالية)
+        """
+        if self._catalog is self.chatbot.catalog and (
+                self._atlas is self.predictor.atlas or not self.predictor.is_ready):
+            return False
+
+        if not self._lock.acquire(blocking=wait):
+            return False
+        try:
+            catalog = self.chatbot.catalog
+            atlas = self.predictor.atlas if self.predictor.is_ready else None
+
+            if catalog is not self._catalog:
+                self._build_static(catalog)
+            if atlas is not None and atlas is not self._atlas:
+                self._build_ml(catalog)
+            self._atlas = atlas
+            return True
+        finally:
+            self._lock.release()
+
+    def _build_static(self, catalog):
+        """بناء النصائح وتوصيات التوافق (لا تعتمد على النموذج)"""
+        n_trees = len(catalog.dataset.trees)
+        advice = {}
+        heuristic = {}
+
+        for gov_name_ar in catalog.get_governorate_names():
+            for season_ar in SEASON_MAPPING.values():
+                key = (gov_name_ar, season_ar)
+                advice[key] = dumps(self.chatbot.get_seasonal_advice(gov_name_ar, season_ar))
+                heuristic[key] = [
+                    dumps(entry)
+                    for entry in self.chatbot.get_tree_recommendation(gov_name_ar, season_ar, n_trees)
+                ]
+
+        # استبدال ذري: القراءات ترى الجداول القديمة أو الجديدة كاملة
+        self._tables = (advice, heuristic, {})
+        self._predictions = {}
+        self._catalog = catalog
+        self._atlas = None
+        self.builds += 1
+
+    def _build_ml(self, catalog):
+        """بناء توصيات نموذج التعلم الآلي من الأطلس الحالي"""
+        n_trees = len(catalog.dataset.trees)
+        advice, heuristic, _ = self._tables
+
+        # النموذج والأطلس يستخدمان أسماء الفصول بالإنجليزية
+        ml = {}
+        for season, season_ar in SEASON_MAPPING.items():
+            for gov_name_ar in catalog.get_governorate_names():
+                ml[(gov_name_ar, season_ar)] = [
+                    dumps(entry) for entry in self.predictor.recommend_trees(gov_name_ar, season, n_trees)
+                ]
+        predictions = {
+            key: StaticPayload.from_value({'success': True, 'data': cell})
+            for key, cell in self.predictor.atlas.items()
+        }
+        self._tables = (advice, heuristic, ml)
+        self._predictions = predictions
+        self.builds += 1
+
+    def seasonal_advice(self, governorate, season):
+        """استجابة /api/seasonal-advice جاهزة كبايتات (None لأسماء غير معروفة)"""
+        key = self._key(governorate, season)
+        advice = self._tables[0].get(key) if key else None
+        if advice is None:
+            return None
+
+        return (b'{"success":true,"data":{"governorate":' + dumps(governorate)
+                + b',"season":' + dumps(season) + b',"advice":' + advice + b'}}')
+
+    def recommendations(self, governorate, season, limit, rank_by='heuristic'):
+        """
+        استجابة /api/recommendations جاهزة كبايتات
+        None إذا لم يكن الجدول متوفراً (اسم غير معروف أو النموذج غير جاهز)
+        """
+        key = self._key(governorate, season)
+        table = self._tables[2] if rank_by == 'ml' else self._tables[1]
+        entries = table.get(key) if key else None
+        if entries is None:
+            return None
+
+        return b'{"success":true,"data":[' + b','.join(entries[:max(limit, 0)]) + b']}'
+
+    def prediction(self, governorate, season, tree_name):
+        """استجابة /api/predict من الأطلس (None إذا لم تكن محسوبة مسبقاً)"""
+        gov_entry = self.chatbot.catalog.get_governorate(governorate)
+        tree = self.chatbot.catalog.get_tree(tree_name)
+        if not gov_entry or not tree:
+            return None
+        return self._predictions.get((gov_entry[0], season, tree['name']))
+
+    def stats(self):
+        """إحصائيات الجداول"""
+        return {
+            'cells': len(self._tables[0]),
+            'ml_cells': len(self._tables[2]),
+            'predictions': len(self._predictions),
+            'builds': self.builds
+        }
@@ -0,0 +1,120 @@
+"""
+توقيت مراحل معالجة الطلب
+كل مرحلة (البحث، ترميز الخصائص، التطبيع، النماذج، التوصيات، ...) تُسجل في
+مدرّج oman_stage_seconds وفي سجل الطلب الحالي، ويُرسل السجل في ترويسة Server-Timing
+"""
+
+import contextvars
+import time
+
+from backend.app import config, metrics
+
+STAGE_DURATION = metrics.Histogram(
+    'oman_stage_seconds', 'زمن كل مرحلة من مراحل التنبؤ والمحادثة', ('stage',)
+)
+
+# سجل مراحل الطلب الحالي: المرحلة -> مجموع الثواني (None خارج الطلبات)
+_stages = contextvars.ContextVar('stages', default=None)
+
+
+def record(stage, seconds):
+    """تسجيل زمن مرحلة"""
+    STAGE_DURATION.observe(seconds, stage)
+    stages = _stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+class Stage:
+    """
+    مؤقت مراحل متتالية بأقل تكلفة: lap(stage) يسجل الزمن منذ آخر نقطة
+    (للحلقات: add(stage) يجمع دون تسجيل، ثم flush() مرة واحدة)
+    """
+
+    __slots__ = ('_last', '_totals')
+
+    def __init__(self):
+        self._last = time.perf_counter()
+        self._totals = {}
+
+    def add(self, stage):
+        """إضافة الزمن منذ آخر نقطة إلى مجموع المرحلة"""
+        now = time.perf_counter()
+        self._totals[stage] = self._totals.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def skip(self):
+        """تجاهل الزمن منذ آخر نقطة (عمل محسوب في مرحلة أخرى)"""
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        """تسجيل المرحلة فوراً"""
+        self.add(stage)
+        self.flush()
+
+    def flush(self):
+        """تسجيل المجاميع المتراكمة"""
+        for stage, seconds in self._totals.items():
+            record(stage, seconds)
+        self._totals.clear()
+
+
+def absorb(observations):
+    """إضافة مراحل سُجلت في عامل الاستدلال (عبر metrics.collect) إلى سجل الطلب الحالي"""
+    stages = _stages.get()
+    if stages is None:
+        return
+    for name, labels, value in observations:
+        if name == STAGE_DURATION.name:
+            stages[labels[0]] = stages.get(labels[0], 0.0) + value
+
+
+def start():
+    """بدء سجل مراحل جديد في المهمة الحالية (مثل مهمة الدفعة المجمّعة) وإرجاعه"""
+    stages = {}
+    _stages.set(stages)
+    return stages
+
+
+def merge(stages):
+    """دمج مراحل من مهمة أخرى في سجل الطلب الحالي"""
+    current_stages = _stages.get()
+    if current_stages is None:
+        return
+    for stage, seconds in stages.items():
+        current_stages[stage] = current_stages.get(stage, 0.0) + seconds
+
+
+def header_value(stages, total):
+    """قيمة ترويسة Server-Timing (ملي ثانية)"""
+    entries = [f'{stage};dur={seconds * 1000:.3f}' for stage, seconds in stages.items()]
+    entries.append(f'total;dur={total * 1000:.3f}')
+    return ', '.join(entries)
+
+
+class ServerTimingMiddleware:
+    """بدء سجل مراحل لكل طلب وإرساله في ترويسة Server-Timing"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not config.SERVER_TIMING:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stages = {}
+        token = _stages.set(stages)
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                # في البث تُرسل المراحل المكتملة قبل أول جزء فقط
+                value = header_value(stages, time.perf_counter() - started).encode('latin-1')
+                message = {**message, 'headers': list(message.get('headers', [])) + [(b'server-timing', value)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _stages.reset(token)
@@ -0,0 +1,259 @@
+"""
+محرك استدلال مُجمّع لنماذج RandomForest و GradientBoosting
+يحوّل الأشجار إلى مصفوفات NumPy متصلة (الخاصية، العتبة، الأبناء، قيمة الورقة)
+ويقيّم جميع الصفوف وجميع الأشجار معاً بتنقل متجهي
+المقارنة كما في sklearn تماماً: تطبيع الخصائص بـ float64 ثم تحويلها إلى float32
+ومقارنتها بعتبات الأشجار الأصلية، فتتطابق النتائج حتى للقيم القريبة من العتبات
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+# عدد الصفوف في كل كتلة تقييم (للحد من حجم مصفوفة العقد المؤقتة)
+CHUNK_ROWS = 4096
+
+# مصفوفات كل غابة كما تُحفظ على القرص
+FOREST_ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+
+# إصدار صيغة المحرك المحفوظ (المحركات بصيغة أقدم تُتجاهل ويُعاد بناؤها)
+FORMAT_VERSION = 2
+
+
+def _replace_file(path, write):
+    """
+    الكتابة في ملف مؤقت ثم استبدال الملف الأصلي
+    العمليات التي عيّنت الملف القديم في الذاكرة تحتفظ بنسخته حتى تنتهي منه
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class CompiledForest:
+    """غابة أشجار مسطّحة في مصفوفات متصلة"""
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_trees(cls, trees, leaf_values):
+        """
+        تسطيح قائمة أشجار sklearn
+
+        Args:
+            trees: كائنات tree_ من sklearn
+            leaf_values: دالة تُرجع قيمة كل عقدة من tree_
+        """
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for tree in trees:
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(n_nodes)
+
+            feature = np.where(is_leaf, 0, tree.feature)
+            threshold = np.where(is_leaf, np.inf, tree.threshold)
+
+            # الأوراق تشير لنفسها فتبقى ثابتة حتى نهاية التنقل
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            values.append(leaf_values(tree))
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.array(roots, dtype=np.intp),
+            max_depth=max_depth
+        )
+
+    def leaf_values(self, X):
+        """
+        قيم الأوراق لكل صف ولكل شجرة: مصفوفة (عدد الصفوف، عدد الأشجار)
+
+        Args:
+            X: الخصائص المطبّعة بـ float32 (كما يحوّلها sklearn قبل التنقل)
+        """
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.roots.shape[0]))
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return self.value[nodes]
+
+    def save(self, directory, prefix):
+        """حفظ المصفوفات كملفات .npy غير مضغوطة (قابلة للتعيين في الذاكرة)"""
+        for name in FOREST_ARRAYS:
+            array = np.ascontiguousarray(getattr(self, name))
+            _replace_file(Path(directory) / f'{prefix}_{name}.npy', lambda f: np.save(f, array))
+
+    @classmethod
+    def load(cls, directory, prefix, max_depth, mmap_mode='r'):
+        """
+        تحميل المصفوفات من القرص
+        مع mmap_mode='r' تتشارك جميع عمليات uvicorn نفس صفحات الذاكرة الفعلية
+        """
+        arrays = {
+            name: np.load(Path(directory) / f'{prefix}_{name}.npy', mmap_mode=mmap_mode)
+            for name in FOREST_ARRAYS
+        }
+        return cls(max_depth=max_depth, **arrays)
+
+    @property
+    def nbytes(self):
+        """حجم مصفوفات الغابة بالبايت"""
+        return sum(getattr(self, name).nbytes for name in FOREST_ARRAYS)
+
+    @property
+    def is_mapped(self):
+        """هل المصفوفات معيّنة من ملفات على القرص"""
+        return isinstance(self.threshold, np.memmap)
+
+
+class CompiledEnsemble:
+    """تقييم RF و GB معاً من مصفوفات مسطّحة على الخصائص الخام (قبل التطبيع)"""
+
+    def __init__(self, rf_forest, gb_forest, gb_baseline, gb_learning_rate, scaler_mean, scaler_scale):
+        self.rf_forest = rf_forest
+        self.gb_forest = gb_forest
+        self.gb_baseline = float(gb_baseline)
+        self.gb_learning_rate = float(gb_learning_rate)
+        self.scaler_mean = np.asarray(scaler_mean, dtype=np.float64)
+        self.scaler_scale = np.asarray(scaler_scale, dtype=np.float64)
+
+    @classmethod
+    def from_sklearn(cls, rf_model, gb_model, scaler):
+        """بناء المحرك من نماذج sklearn المدربة"""
+        class_index = list(rf_model.classes_).index(1)
+
+        def rf_values(tree):
+            # نسبة الفئة 1 في كل ورقة (كما في predict_proba لكل شجرة)
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1)
+            return counts[:, class_index] / np.where(totals == 0, 1, totals)
+
+        def gb_values(tree):
+            return tree.value[:, 0, 0]
+
+        rf_forest = CompiledForest.from_trees(
+            [estimator.tree_ for estimator in rf_model.estimators_], rf_values
+        )
+        gb_forest = CompiledForest.from_trees(
+            [estimator.tree_ for estimator in gb_model.estimators_[:, 0]], gb_values
+        )
+
+        # القيمة الابتدائية لـ GB = decision_function ناقص مجموع مساهمات الأشجار
+        X0 = np.zeros((1, scaler.n_features_in_))
+        X0_scaled = scaler.transform(X0)
+        trees_sum = sum(estimator.predict(X0_scaled)[0] for estimator in gb_model.estimators_[:, 0])
+        gb_baseline = gb_model.decision_function(X0_scaled)[0] - gb_model.learning_rate * trees_sum
+
+        return cls(rf_forest, gb_forest, gb_baseline, gb_model.learning_rate, scaler.mean_, scaler.scale_)
+
+    def _scale(self, X):
+        """تطبيع الخصائص كما في StandardScaler.transform ثم التحويل إلى float32 كما في أشجار sklearn"""
+        return ((np.asarray(X, dtype=np.float64) - self.scaler_mean) / self.scaler_scale).astype(np.float32)
+
+    def predict_proba(self, X):
+        """
+        احتمال النجاح (الفئة 1) لكل صف من النموذجين
+
+        Args:
+            X: مصفوفة الخصائص الخام (بدون تطبيع)
+
+        Returns:
+            tuple: (احتمالات RF، احتمالات GB)
+        """
+        return self.rf_proba(X), self.gb_proba(X)
+
+    def rf_proba(self, X):
+        """احتمالات Random Forest (متوسط قيم الأوراق)"""
+        X = self._scale(X)
+        rf_prob = np.empty(X.shape[0])
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            chunk = X[start:start + CHUNK_ROWS]
+            rf_prob[start:start + CHUNK_ROWS] = self.rf_forest.leaf_values(chunk).mean(axis=1)
+        return rf_prob
+
+    def gb_proba(self, X):
+        """احتمالات Gradient Boosting (القيمة الابتدائية + مجموع الأشجار عبر الدالة اللوجستية)"""
+        X = self._scale(X)
+        gb_prob = np.empty(X.shape[0])
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            chunk = X[start:start + CHUNK_ROWS]
+            raw = self.gb_baseline + self.gb_learning_rate * self.gb_forest.leaf_values(chunk).sum(axis=1)
+            gb_prob[start:start + CHUNK_ROWS] = 1 / (1 + np.exp(-raw))
+        return gb_prob
+
+    def save(self, directory):
+        """حفظ المحرك: مصفوفات .npy لكل غابة وملف meta.json للمعاملات"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.rf_forest.save(directory, 'rf')
+        self.gb_forest.save(directory, 'gb')
+
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'scaler_mean': self.scaler_mean.tolist(),
+            'scaler_scale': self.scaler_scale.tolist(),
+            'rf_max_depth': self.rf_forest.max_depth,
+            'gb_max_depth': self.gb_forest.max_depth,
+            'gb_baseline': self.gb_baseline,
+            'gb_learning_rate': self.gb_learning_rate
+        }
+        _replace_file(directory / 'meta.json', lambda f: f.write(json.dumps(meta).encode('utf-8')))
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """
+        تحميل المحرك المحفوظ (معيّن في الذاكرة افتراضياً)
+
+        Raises:
+            ValueError: إذا كان المحرك محفوظاً بصيغة أخرى
+        """
+        directory = Path(directory)
+        with open(directory / 'meta.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"صيغة المحرك المحفوظ غير مدعومة: {meta.get('format_version')}")
+
+        return cls(
+            rf_forest=CompiledForest.load(directory, 'rf', meta['rf_max_depth'], mmap_mode),
+            gb_forest=CompiledForest.load(directory, 'gb', meta['gb_max_depth'], mmap_mode),
+            gb_baseline=meta['gb_baseline'],
+            gb_learning_rate=meta['gb_learning_rate'],
+            scaler_mean=meta['scaler_mean'],
+            scaler_scale=meta['scaler_scale']
+        )
+
+    @property
+    def nbytes(self):
+        """حجم مصفوفات المحرك بالبايت"""
+        return self.rf_forest.nbytes + self.gb_forest.nbytes
+
+    @property
+    def is_mapped(self):
+        """هل مصفوفات المحرك معيّنة من القرص (مشتركة بين العمليات)"""
+        return self.rf_forest.is_mapped and self.gb_forest.is_mapped
@@ -0,0 +1,91 @@
+"""
+قياس جودة وسرعة مطابقة أسئلة الـ Chatbot على مجموعة أسئلة ثابتة
+تتضمن صيغاً مختلفة للهمزة والتشكيل والتاء المربوطة والسوابق ("ال" و"و")
+
+التشغيل من جذر المشروع:
+    python -m benchmarks.chat_matching
+"""
+
+import time
+
+from backend.app.arabic import tokenize
+from backend.app.chatbot import chatbot
+
+# (السؤال، أول كلمة مفتاحية في السؤال المتوقع أو None إذا كان المتوقع عدم الفهم)
+QUESTIONS = [
+    ('ما هي أفضل الأشجار للزراعة في عمان', 'ما هي'),
+    ('ما هى افضل الاشجار للزراعه فى عمان', 'ما هي'),
+    ('مَا هِيَ أَفْضَلُ الأَشْجَارِ لِلزِّرَاعَةِ فِي عُمَان', 'ما هي'),
+    ('متى أزرع؟ ما هو وقت الزراعة المناسب', 'متى'),
+    ('متي ازرع والموسم المناسب', 'متى'),
+    ('كم كمية المياه التي أحتاجها للري', 'كم'),
+    ('كم كميه المياه للري', 'كم'),
+    ('أي تربة مناسبة', 'تربة'),
+    ('اي تربه مناسبه', 'تربة'),
+    ('السماد العضوي والتسميد', 'سماد'),
+    ('ما هي المسافات بين الأشجار', 'مسافة'),
+    ('مسافة الزراعة بين الاشجار', 'مسافة'),
+    ('الآفات والأمراض والحشرات', 'آفات'),
+    ('الافات والامراض ومكافحة الحشرات', 'آفات'),
+    ('كيف أوفر الماء بالري بالتنقيط', 'ماء'),
+    ('اختيار الشتلات وجودتها', 'شتلة'),
+    ('ماذا أزرع في الربيع', 'ربيع'),
+    ('الزراعة في الصيف', 'صيف'),
+    ('الخريف وقت ممتاز؟', 'خريف'),
+    ('نصائح الشتاء', 'شتاء'),
+    ('الزراعة في مسقط', 'مسقط'),
+    ('ظفار وصلالة', 'ظفار'),
+    ('الزراعة في صحار بالباطنة', 'الباطنة'),
+    ('نزوى الداخلية', 'الداخلية'),
+    ('معلومات عن شجرة اللبان', 'اللبان'),
+    ('معلومات عن شجره النخيل', 'النخيل'),
+    ('كيف أعتني بالنخيل', 'النخيل'),
+    ('معلومات عن الليمون العماني', 'الليمون العُماني'),
+    ('Date Palm information', 'النخيل'),
+    ('olive', 'الزيتون'),
+    ('مرحبا', None),
+    ('ما هو الطقس غدا', None),
+]
+
+# عدد مرات تكرار المجموعة لقياس الزمن
+ROUNDS = 200
+
+
+def run():
+    """تشغيل القياس وطباعة النتائج"""
+    messages = [question.strip().lower() for question, _ in QUESTIONS]
+
+    misses = []
+    for message, (question, expected) in zip(messages, QUESTIONS):
+        match = chatbot._find_best_match(message)
+        matched = match['keywords'][0] if match else None
+        if matched != expected:
+            misses.append((question, expected, matched))
+    hits = len(QUESTIONS) - len(misses)
+
+    # زمن المطابقة دون تخزين التقطيع (أول مرة لكل رسالة)
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        tokenize.cache_clear()
+        for message in messages:
+            chatbot._find_best_match(message)
+    cold_us = (time.perf_counter() - start) / (ROUNDS * len(messages)) * 1e6
+
+    # زمن المطابقة مع التقطيع المخزّن (أسئلة متكررة)
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for message in messages:
+            chatbot._find_best_match(message)
+    warm_us = (time.perf_counter() - start) / (ROUNDS * len(messages)) * 1e6
+
+    print(f"الأسئلة: {len(QUESTIONS)}")
+    print(f"الدقة: {hits}/{len(QUESTIONS)} ({hits / len(QUESTIONS):.0%})")
+    for question, expected, matched in misses:
+        print(f"  خطأ: {question} (المتوقع: {expected}، الناتج: {matched})")
+    print(f"زمن المطابقة (أول مرة): {cold_us:.1f} ميكروثانية")
+    print(f"زمن المطابقة (سؤال متكرر): {warm_us:.1f} ميكروثانية")
+    print(f"ذاكرة التقطيع: {tokenize.cache_info()}")
+
+
+if __name__ == '__main__':
+    run()
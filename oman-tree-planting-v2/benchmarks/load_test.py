@@ -0,0 +1,299 @@
+"""
+اختبار الحمل عبر HTTP على نسخة محلية من الخادم (uvicorn)
+يشغّل backend.app.main:app ثم يرسل خليطاً قابلاً للضبط من طلبات /api/predict و /api/predict/batch
+و /api/chat و /api/recommendations و /api/trees بمعدلات وصول ثابتة (حلقة مفتوحة: لا ينتظر
+الطلب السابق)، ويطبع زمن الاستجابة (p50/p95/p99) والأخطاء والإنتاجية لكل معدل وأعلى معدل يتحمله الخادم
+
+التشغيل من جذر المشروع:
+    python -m benchmarks.load_test --rates 20,50,100,200 --duration 15
+    python -m benchmarks.load_test --workers 2 --env OMAN_INFERENCE_POOL=process --env OMAN_INFERENCE_WORKERS=2
+    python -m benchmarks.load_test --url http://localhost:8000 --mix predict=6,chat=3,trees=1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+
+import httpx
+import numpy as np
+
+from backend.app import config
+from backend.app.catalog import SEASON_MAPPING, get_catalog
+from benchmarks.chat_matching import QUESTIONS
+
+# أوزان أنواع الطلبات الافتراضية
+DEFAULT_MIX = {'predict': 40, 'predict_batch': 5, 'chat': 20, 'recommendations': 15, 'trees': 20}
+
+# المعدل يُعد محتملاً إذا حقق هذه النسبة من المعدل المطلوب بأخطاء أقل من MAX_ERROR_RATE
+MIN_THROUGHPUT_RATIO = 0.95
+MAX_ERROR_RATE = 0.01
+
+
+class RequestFactory:
+    """توليد طلبات عشوائية (ببذرة ثابتة) من البيانات المرفقة"""
+
+    def __init__(self, mix, custom_ratio=0.5, batch_size=10, seed=42):
+        catalog = get_catalog()
+        self.trees = [tree['name'] for tree in catalog.dataset.trees]
+        self.governorates = catalog.get_governorate_names()
+        self.seasons = list(SEASON_MAPPING)
+        self.questions = [question for question, _ in QUESTIONS]
+        self.custom_ratio = custom_ratio
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+
+    def _prediction(self):
+        request = {
+            'governorate': self.random.choice(self.governorates),
+            'season': self.random.choice(self.seasons),
+            'tree_name': self.random.choice(self.trees)
+        }
+        # جزء من الطلبات بمعايير مخصصة (يمر بالنموذج بدلاً من الأطلس)
+        if self.random.random() < self.custom_ratio:
+            request['rainfall'] = round(self.random.uniform(0, 400), 1)
+            request['temperature'] = round(self.random.uniform(10, 45), 1)
+        return request
+
+    def next(self):
+        """(النوع، الطريقة، المسار، جسم JSON)"""
+        kind = self.random.choices(self.kinds, self.weights)[0]
+        if kind == 'predict':
+            return kind, 'POST', '/api/predict', self._prediction()
+        if kind == 'predict_batch':
+            return kind, 'POST', '/api/predict/batch', [self._prediction() for _ in range(self.batch_size)]
+        if kind == 'chat':
+            return kind, 'POST', '/api/chat', {
+                'message': self.random.choice(self.questions),
+                'session_id': f'load-{self.random.randrange(100)}'
+            }
+        if kind == 'recommendations':
+            gov = self.random.choice(self.governorates)
+            season = self.random.choice(self.seasons)
+            rank_by = self.random.choice(('heuristic', 'ml'))
+            return kind, 'GET', f'/api/recommendations/{gov}/{season}?limit=5&rank_by={rank_by}', None
+        if self.random.random() < 0.5:
+            return kind, 'GET', '/api/trees', None
+        return kind, 'GET', f'/api/trees/{self.random.choice(self.trees)}', None
+
+
+def parse_mix(value):
+    """قراءة الخليط بصيغة predict=40,chat=20"""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"نوع طلب غير معروف: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, workers, env):
+    """تشغيل uvicorn محلياً كعملية منفصلة"""
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'backend.app.main:app',
+         '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers), '--log-level', 'warning'],
+        cwd=config.PROJECT_ROOT,
+        env={**os.environ, **env}
+    )
+
+
+async def wait_ready(client, timeout, require_model):
+    """انتظار جاهزية الخادم (والنموذج إذا طُلب)"""
+    path = '/health/ready' if require_model else '/health/live'
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(path)).status_code == 200:
+                return True
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    return False
+
+
+async def run_step(client, factory, rate, duration):
+    """
+    إرسال الطلبات بمعدل ثابت لمدة محددة (حلقة مفتوحة)
+    الزمن يُقاس من موعد الإرسال المخطط، فيشمل تأخر العميل أو الخادم عن الجدول
+
+    Returns:
+        tuple: (السجلات، زمن الخطوة الفعلي، أقصى تأخر عن الجدول)
+    """
+    records = []
+    max_lag = 0.0
+    loop = asyncio.get_running_loop()
+
+    async def send(kind, method, path, body, scheduled):
+        try:
+            response = await client.request(method, path, json=body)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        records.append((kind, status, loop.time() - scheduled))
+
+    tasks = []
+    start = loop.time()
+    for i in range(int(rate * duration)):
+        scheduled = start + i / rate
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            max_lag = max(max_lag, -delay)
+        tasks.append(asyncio.create_task(send(*factory.next(), scheduled)))
+
+    await asyncio.gather(*tasks)
+    return records, loop.time() - start, max_lag
+
+
+def _latency_summary(latencies):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {'p50_ms': round(p50, 2), 'p95_ms': round(p95, 2), 'p99_ms': round(p99, 2),
+            'max_ms': round(max(latencies) * 1000, 2)}
+
+
+def summarize(records, rate, elapsed, max_lag):
+    """تقرير الخطوة: الإجمالي ولكل نوع طلب"""
+    by_kind = defaultdict(list)
+    for record in records:
+        by_kind[record[0]].append(record)
+
+    def section(items):
+        ok = [latency for _, status, latency in items if status == 200]
+        errors = Counter(str(status) for _, status, _ in items if status != 200)
+        summary = {
+            'requests': len(items),
+            'ok': len(ok),
+            'error_rate': round(1 - len(ok) / len(items), 4) if items else 0.0,
+            'errors': dict(errors)
+        }
+        if ok:
+            summary.update(_latency_summary(ok))
+        return summary
+
+    report = section(records)
+    report.update({
+        'target_rps': rate,
+        'achieved_rps': round(report['ok'] / elapsed, 1) if elapsed else 0.0,
+        'client_max_lag_ms': round(max_lag * 1000, 1),
+        'endpoints': {kind: section(items) for kind, items in sorted(by_kind.items())}
+    })
+    return report
+
+
+def print_report(report):
+    print(f"\n=== {report['target_rps']} طلب/ث: المحقق {report['achieved_rps']} طلب/ث، "
+          f"الأخطاء {report['error_rate']:.2%} {report['errors'] or ''}")
+    header = f"{'الطلب':<16}{'العدد':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'الأقصى':>10}{'الأخطاء':>10}"
+    print(header)
+    for kind, section in [('الكل', report), *report['endpoints'].items()]:
+        print(f"{kind:<16}{section['requests']:>8}"
+              f"{section.get('p50_ms', '-'):>10}{section.get('p95_ms', '-'):>10}"
+              f"{section.get('p99_ms', '-'):>10}{section.get('max_ms', '-'):>10}"
+              f"{section['error_rate']:>10.2%}")
+    if report['client_max_lag_ms'] > 50:
+        print(f"⚠️ تأخر العميل عن الجدول حتى {report['client_max_lag_ms']} ms: العميل نفسه قد يكون عنق الزجاجة")
+
+
+def sustainable(report, slo_ms=None):
+    """هل تحمّل الخادم هذا المعدل"""
+    if report['achieved_rps'] < MIN_THROUGHPUT_RATIO * report['target_rps']:
+        return False
+    if report['error_rate'] > MAX_ERROR_RATE:
+        return False
+    return slo_ms is None or report.get('p99_ms', float('inf')) <= slo_ms
+
+
+async def main(args):
+    env = dict(item.split('=', 1) for item in args.env)
+    server = None
+    base_url = args.url
+    if base_url is None:
+        port = _free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        server = start_server(port, args.workers, env)
+
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+            if not await wait_ready(client, args.startup_timeout, not args.no_model):
+                print(f"❌ الخادم غير جاهز بعد {args.startup_timeout} ثانية")
+                return 1
+
+            factory = RequestFactory(args.mix, args.custom_ratio, args.batch_size, args.seed)
+            if args.warmup:
+                await run_step(client, factory, min(args.rates), args.warmup)
+
+            reports = []
+            for rate in args.rates:
+                records, elapsed, max_lag = await run_step(client, factory, rate, args.duration)
+                report = summarize(records, rate, elapsed, max_lag)
+                print_report(report)
+                reports.append(report)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    passing = [report['target_rps'] for report in reports if sustainable(report, args.slo_ms)]
+    saturation = max(passing) if passing else None
+    print(f"\nأعلى معدل محتمل: {saturation if saturation else 'لا شيء'} طلب/ث"
+          + (f" (p99 ≤ {args.slo_ms} ms)" if args.slo_ms else ''))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'url': base_url,
+                'workers': args.workers if server else None,
+                'env': env,
+                'mix': args.mix,
+                'duration_s': args.duration,
+                'steps': reports,
+                'saturation_rps': saturation
+            }, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description='اختبار الحمل عبر HTTP')
+    parser.add_argument('--url', help='عنوان خادم يعمل مسبقاً (وإلا يُشغّل uvicorn محلياً)')
+    parser.add_argument('--workers', type=int, default=1, help='عدد عمليات uvicorn')
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE',
+                        help='متغيرات بيئة للخادم (مثل OMAN_INFERENCE_WORKERS=4)')
+    parser.add_argument('--rates', default='10,25,50,100',
+                        type=lambda value: [float(rate) for rate in value.split(',')],
+                        help='معدلات الوصول بالطلب/ثانية (خطوة لكل معدل)')
+    parser.add_argument('--duration', type=float, default=10.0, help='مدة كل خطوة بالثواني')
+    parser.add_argument('--warmup', type=float, default=3.0, help='مدة الإحماء بأقل معدل (0 للتعطيل)')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='أوزان الطلبات: predict=40,chat=20,...')
+    parser.add_argument('--custom-ratio', type=float, default=0.5,
+                        help='نسبة طلبات التنبؤ بمعايير مخصصة (تمر بالنموذج)')
+    parser.add_argument('--batch-size', type=int, default=10, help='عدد العناصر في /api/predict/batch')
+    parser.add_argument('--connections', type=int, default=100, help='أقصى عدد اتصالات متزامنة')
+    parser.add_argument('--timeout', type=float, default=10.0, help='مهلة الطلب بالثواني')
+    parser.add_argument('--slo-ms', type=float, help='أقصى p99 مقبول لحساب أعلى معدل محتمل')
+    parser.add_argument('--startup-timeout', type=float, default=120.0, help='مهلة جاهزية الخادم بالثواني')
+    parser.add_argument('--no-model', action='store_true', help='عدم انتظار تحميل النموذج (/health/live فقط)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='مسار ملف تقرير JSON')
+    return asyncio.run(main(parser.parse_args(argv)))
+
+
+if __name__ == '__main__':
+    sys.exit(run())
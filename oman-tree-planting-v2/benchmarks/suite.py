@@ -0,0 +1,254 @@
+"""
+مجموعة قياسات دقيقة للمتنبئ والـ Chatbot والبحث في البيانات
+تعمل دون شبكة على البيانات والنماذج المرفقة، وتكتب النتائج بصيغة JSON،
+وتفشل (رمز خروج 1) إذا تجاوز أي قياس خط الأساس المحفوظ بأكثر من الحد المسموح
+(المقارنة تُخطّى إذا اختلفت بيئة القياس عن بيئة خط الأساس)
+
+التشغيل من جذر المشروع:
+    python -m benchmarks.suite                      # القياس والمقارنة بخط الأساس
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --save-baseline      # تحديث خط الأساس بعد تحسين مقصود
+    python -m benchmarks.suite --ignore-environment # المقارنة رغم اختلاف الإصدارات أو النموذج
+    python -m benchmarks.suite --only predict_batch_100,chat_match
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import sklearn
+
+from backend.app import config
+from backend.app.catalog import SEASON_MAPPING
+from backend.app.chatbot import chatbot
+from backend.app.ml_model import TreeSuccessPredictor
+from benchmarks.chat_matching import QUESTIONS
+
+BASELINE_FILE = Path(__file__).resolve().parent / 'baseline.json'
+
+# الزيادة المسموحة في الزمن قبل اعتبارها تراجعاً (0.25 = 25%)
+DEFAULT_THRESHOLD = 0.25
+
+# حقول البيئة التي يجب أن تطابق خط الأساس لتكون المقارنة ذات معنى
+ENVIRONMENT_KEYS = ('python', 'numpy', 'sklearn', 'machine', 'inference_engine', 'model')
+
+
+def _prediction_requests(predictor, count):
+    """طلبات تنبؤ بمعايير مخصصة مختلفة (لا يُجاب عنها من الأطلس أو الذاكرة)"""
+    trees = [tree['name'] for tree in predictor.trees_db['trees']]
+    governorates = predictor.catalog.get_governorate_names()
+    seasons = list(SEASON_MAPPING)
+    return [
+        {
+            'governorate': governorates[i % len(governorates)],
+            'season': seasons[i % len(seasons)],
+            'tree_name': trees[i % len(trees)],
+            'custom_params': {'rainfall': 10 + (i % 400) * 0.5, 'temperature_avg': 15 + (i % 25)}
+        }
+        for i in range(count)
+    ]
+
+
+def _load_predictor():
+    """
+    المتنبئ بالنموذج المرفق، أو بنموذج مدرب في الذاكرة إذا تعذر تحميله
+    (مثل ملفات pkl من إصدار sklearn مختلف) - لا يُكتب شيء على القرص
+    """
+    predictor = TreeSuccessPredictor()
+    if predictor.ensure_loaded():
+        source = 'loaded'
+    else:
+        predictor.train_initial_model()
+        source = 'trained'
+    # قياس مسار النموذج نفسه: بدون ذاكرة نتائج
+    predictor.cache.max_size = 0
+    return predictor, source
+
+
+def build_cases(predictor):
+    """
+    القياسات: الاسم -> (الدالة، عدد الاستدعاءات في كل تكرار، عدد التكرارات)
+    الزمن المسجل لكل استدعاء واحد
+    """
+    single = _prediction_requests(predictor, 1)[0]
+    batches = {size: _prediction_requests(predictor, size) for size in (1, 100, 10_000)}
+    messages = [question.strip().lower() for question, _ in QUESTIONS]
+    pairs = [(gov, season) for gov in chatbot.catalog.get_governorate_names() for season in SEASON_MAPPING.values()]
+
+    def predict_success():
+        predictor.predict_success(single['governorate'], single['season'], single['tree_name'], single['custom_params'])
+
+    def chat_match():
+        for message in messages:
+            chatbot._find_best_match(message)
+
+    def tree_recommendation():
+        for gov, season in pairs:
+            chatbot.get_tree_recommendation(gov, season)
+
+    def training_data():
+        predictor._generate_training_data()
+
+    def train_model():
+        TreeSuccessPredictor(predictor.catalog).train_initial_model()
+
+    return {
+        'predict_success': (predict_success, 20, 15),
+        'predict_batch_1': (lambda: predictor.predict_many(batches[1]), 20, 15),
+        'predict_batch_100': (lambda: predictor.predict_many(batches[100]), 10, 10),
+        'predict_batch_10000': (lambda: predictor.predict_many(batches[10_000]), 1, 7),
+        'chat_match': (chat_match, 50, 15),
+        'tree_recommendation': (tree_recommendation, 10, 15),
+        'training_data': (training_data, 5, 15),
+        'train_model': (train_model, 1, 3),
+    }
+
+
+def measure(fn, number, repeat):
+    """زمن الاستدعاء الواحد لكل تكرار (بعد استدعاء تحمية)"""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return {
+        'median_s': statistics.median(timings),
+        'min_s': min(timings),
+        'max_s': max(timings),
+        'number': number,
+        'repeat': repeat
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    مقارنة أفضل زمن بخط الأساس (أقل تأثراً بضجيج الجهاز من الوسيط)
+    خط الأساس خاص بالجهاز: يُحفظ بـ --save-baseline على الجهاز الذي تُجرى عليه المقارنة
+
+    Returns:
+        list: (الاسم، خط الأساس، الحالي، النسبة) للقياسات التي تجاوزت الحد
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        ratio = result['min_s'] / reference['min_s']
+        result['baseline_min_s'] = reference['min_s']
+        result['ratio'] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append((name, reference['min_s'], result['min_s'], ratio))
+    return regressions
+
+
+def environment_mismatch(meta, baseline_meta):
+    """
+    حقول البيئة المختلفة عن بيئة خط الأساس
+
+    Returns:
+        dict: الحقل -> (قيمة خط الأساس، القيمة الحالية)
+    """
+    return {
+        key: (baseline_meta.get(key), meta.get(key))
+        for key in ENVIRONMENT_KEYS
+        if baseline_meta.get(key) != meta.get(key)
+    }
+
+
+def _format_time(seconds):
+    if seconds >= 1:
+        return f'{seconds:.2f} s'
+    if seconds >= 1e-3:
+        return f'{seconds * 1e3:.2f} ms'
+    return f'{seconds * 1e6:.1f} µs'
+
+
+def run(argv=None):
+    """تشغيل القياسات وإرجاع رمز الخروج"""
+    parser = argparse.ArgumentParser(description='قياسات الأداء الدقيقة')
+    parser.add_argument('--only', help='أسماء القياسات مفصولة بفواصل')
+    parser.add_argument('--output', help='مسار ملف نتائج JSON')
+    parser.add_argument('--baseline', default=str(BASELINE_FILE), help='ملف خط الأساس')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='الزيادة المسموحة في أفضل زمن (0.25 = 25%%)')
+    parser.add_argument('--save-baseline', action='store_true', help='حفظ النتائج كخط أساس جديد')
+    parser.add_argument('--ignore-environment', action='store_true',
+                        help='المقارنة بخط الأساس حتى لو اختلفت بيئة القياس')
+    args = parser.parse_args(argv)
+
+    predictor, model_source = _load_predictor()
+    cases = build_cases(predictor)
+    if args.only:
+        names = [name.strip() for name in args.only.split(',')]
+        unknown = [name for name in names if name not in cases]
+        if unknown:
+            parser.error(f"قياسات غير معروفة: {', '.join(unknown)}")
+        cases = {name: cases[name] for name in names}
+
+    results = {}
+    for name, (fn, number, repeat) in cases.items():
+        results[name] = measure(fn, number, repeat)
+        print(f"{name:<22} {_format_time(results[name]['median_s']):>12}  (أدنى {_format_time(results[name]['min_s'])})")
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'machine': platform.machine(),
+            'inference_engine': config.INFERENCE_ENGINE,
+            'model': model_source,
+            'timestamp': time.time()
+        },
+        'results': results
+    }
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        existing = json.loads(baseline_path.read_text(encoding='utf-8')) if baseline_path.exists() else {}
+        # حفظ القياسات المنفذة فقط مع الإبقاء على البقية
+        merged = {**existing.get('results', {}), **results}
+        baseline_path.write_text(
+            json.dumps({'meta': report['meta'], 'results': merged}, ensure_ascii=False, indent=2) + '\n',
+            encoding='utf-8'
+        )
+        print(f"✅ حُفظ خط الأساس في {baseline_path}")
+        regressions = []
+    elif baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+        mismatch = environment_mismatch(report['meta'], baseline.get('meta', {}))
+        if mismatch and not args.ignore_environment:
+            # أزمنة من بيئة أخرى (إصدارات أو محرك أو نموذج مختلف) لا تصلح للمقارنة
+            regressions = []
+            report['environment_mismatch'] = mismatch
+            for key, (expected, current) in mismatch.items():
+                print(f"⚠️ {key}: خط الأساس {expected}، الحالي {current}")
+            print("⚠️ بيئة القياس تختلف عن خط الأساس: تُخطّى المقارنة "
+                  "(--ignore-environment للمقارنة، أو --save-baseline لخط أساس لهذه البيئة)")
+        else:
+            regressions = compare(results, baseline.get('results', {}), args.threshold)
+            report['threshold'] = args.threshold
+            report['regressions'] = [name for name, *_ in regressions]
+            for name, reference, current, ratio in regressions:
+                print(f"❌ تراجع {name}: {_format_time(reference)} ← {_format_time(current)} (×{ratio:.2f})")
+            if not regressions:
+                print(f"✅ لا تراجع عن خط الأساس (الحد {args.threshold:.0%})")
+    else:
+        regressions = []
+        print(f"⚠️ لا يوجد خط أساس في {baseline_path} (استخدم --save-baseline)")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,4 @@
+"""
+إعداد pytest: وجود هذا الملف في جذر المشروع يضيف الجذر إلى sys.path
+فتعمل `pytest tests/` دون تثبيت الحزمة (استيراد backend.app ...)
+"""
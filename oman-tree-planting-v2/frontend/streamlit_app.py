@@ -113,6 +113,17 @@ def get_trees():
         return []
     return []
 
+@st.cache_data
+def get_tree_names():
+    """أسماء الأشجار فقط (لقوائم الاختيار)"""
+    try:
+        response = requests.get(f"{API_URL}/api/trees", params={"fields": "name"})
+        if response.status_code == 200:
+            return [t['name'] for t in response.json()['data']]
+    except:
+        return []
+    return []
+
 @st.cache_data
 def get_governorates():
     try:
@@ -140,15 +151,52 @@ def get_prediction(governorate, season, tree_name, custom_params=None):
         st.error(f"خطأ في الاتصال: {e}")
     return None
 
-def get_chat_response(message, context=None):
+def stream_chat_response(message, context=None):
+    """بث رد الـ Chatbot: يُرجع (الحدث، البيانات) لكل حدث SSE فور وصوله"""
+    payload = {"message": message, "context": context}
+    with requests.post(f"{API_URL}/api/chat/stream", json=payload, stream=True) as response:
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                yield event, json.loads(line[len("data: "):])
+
+def render_chat_details(details):
+    """عرض الأشجار ذات الصلة والأسئلة المقترحة بعد الجواب (حدث details)"""
+    lines = []
+    if details.get("related_trees"):
+        names = "، ".join(f"{tree['name']} ({tree['name_en']})" for tree in details["related_trees"])
+        lines.append(f"🌳 أشجار ذات صلة: {names}")
+    if details.get("suggestions"):
+        lines.append("💡 أسئلة مقترحة: " + " • ".join(details["suggestions"]))
+    if lines:
+        st.caption("  \n".join(lines))
+
+def send_chat_message(user_message):
+    """إرسال رسالة للـ Chatbot وعرض الجواب تدريجياً أثناء وصوله"""
+    st.session_state.messages.append({"role": "user", "content": user_message})
+    st.markdown(f'<div class="chat-message user-message">👤 أنت: {user_message}</div>', unsafe_allow_html=True)
+    
+    placeholder = st.empty()
+    answer = ""
+    details = None
     try:
-        payload = {"message": message, "context": context}
-        response = requests.post(f"{API_URL}/api/chat", json=payload)
-        if response.status_code == 200:
-            return response.json()['data']
+        for event, data in stream_chat_response(user_message):
+            if event == "answer":
+                answer += data["delta"]
+                placeholder.markdown(f'<div class="chat-message bot-message">🤖 المساعد: {answer}</div>', unsafe_allow_html=True)
+            elif event == "details":
+                details = data
+                render_chat_details(details)
+            elif event == "error":
+                st.error(f"خطأ في Chatbot: {data['detail']}")
     except Exception as e:
         st.error(f"خطأ في Chatbot: {e}")
-    return None
+    
+    if answer:
+        st.session_state.messages.append({"role": "assistant", "content": answer, "details": details})
 
 # الصفحة الرئيسية
 if page == "🏠 الصفحة الرئيسية":
@@ -204,10 +252,10 @@ elif page == "📊 تحليل الزراعة":
     st.markdown("## 📊 تحليل نجاح الزراعة - نظام موسمي متقدم")
     
     # تحميل البيانات
-    trees = get_trees()
+    tree_names = get_tree_names()
     governorates = get_governorates()
     
-    if not trees or not governorates:
+    if not tree_names or not governorates:
         st.error("⚠️ تأكد من تشغيل Backend Server أولاً!")
         st.code("cd backend && python -m uvicorn app.main:app --reload", language="bash")
         st.stop()
@@ -224,7 +272,7 @@ elif page == "📊 تحليل الزراعة":
         
         selected_tree = st.selectbox(
             "🌳 اختر الشجرة:",
-            [t['name'] for t in trees],
+            tree_names,
             help="اختر نوع الشجرة المراد زراعتها"
         )
     
@@ -376,6 +424,8 @@ elif page == "💬 Chatbot الذكي":
                 st.markdown(f'<div class="chat-message user-message">👤 أنت: {message["content"]}</div>', unsafe_allow_html=True)
             else:
                 st.markdown(f'<div class="chat-message bot-message">🤖 المساعد: {message["content"]}</div>', unsafe_allow_html=True)
+                if message.get("details"):
+                    render_chat_details(message["details"])
     
     # أمثلة سريعة
     st.markdown("### 💡 أمثلة سريعة:")
@@ -383,43 +433,29 @@ elif page == "💬 Chatbot الذكي":
     
     with examples_col1:
         if st.button("ما هي أفضل الأشجار لعمان؟"):
-            user_message = "ما هي أفضل الأشجار لعمان؟"
-            st.session_state.messages.append({"role": "user", "content": user_message})
-            response = get_chat_response(user_message)
-            if response:
-                st.session_state.messages.append({"role": "assistant", "content": response['answer']})
+            with chat_container:
+                send_chat_message("ما هي أفضل الأشجار لعمان؟")
             st.rerun()
     
     with examples_col2:
         if st.button("متى أزرع النخيل؟"):
-            user_message = "متى أزرع النخيل؟"
-            st.session_state.messages.append({"role": "user", "content": user_message})
-            response = get_chat_response(user_message)
-            if response:
-                st.session_state.messages.append({"role": "assistant", "content": response['answer']})
+            with chat_container:
+                send_chat_message("متى أزرع النخيل؟")
             st.rerun()
     
     with examples_col3:
         if st.button("نصائح الري في الصيف"):
-            user_message = "كيف أروي الأشجار في الصيف؟"
-            st.session_state.messages.append({"role": "user", "content": user_message})
-            response = get_chat_response(user_message)
-            if response:
-                st.session_state.messages.append({"role": "assistant", "content": response['answer']})
+            with chat_container:
+                send_chat_message("كيف أروي الأشجار في الصيف؟")
             st.rerun()
     
     # Chat input
     user_input = st.chat_input("اكتب سؤالك هنا...")
     
     if user_input:
-        st.session_state.messages.append({"role": "user", "content": user_input})
-        
-        with st.spinner("جاري التفكير..."):
-            response = get_chat_response(user_input)
-            
-            if response:
-                st.session_state.messages.append({"role": "assistant", "content": response['answer']})
-                st.rerun()
+        with chat_container:
+            send_chat_message(user_input)
+        st.rerun()
 
 # صفحة قاعدة البيانات
 elif page == "🌲 قاعدة بيانات الأشجار":
@@ -23,15 +23,13 @@ if [ ! -f "data/oman_trees_database.json" ]; then
     exit 1
 fi
 
-# إنشاء مجلد النماذج
-mkdir -p backend/models
+# مجلد النماذج (يمكن تغييره عبر OMAN_MODEL_DIR)
+export OMAN_MODEL_DIR="${OMAN_MODEL_DIR:-$(pwd)/models}"
 
-# تدريب النموذج إذا لم يكن موجوداً
-if [ ! -f "backend/models/rf_model.pkl" ]; then
+# تدريب النموذج إذا لم يكن موجوداً (الخادم لا يدرّب عند البدء)
+if [ ! -f "$OMAN_MODEL_DIR/rf_model.pkl" ]; then
     echo "🤖 تدريب نموذج ML للمرة الأولى..."
-    cd backend/app
-    python3 -c "from ml_model import predictor; predictor.train_initial_model(); predictor.save_model('../models/')"
-    cd ../..
+    python3 -m backend.app.ml_model
     echo "✅ اكتمل تدريب النموذج"
 fi
 
@@ -41,10 +39,8 @@ echo "=================================================="
 
 # تشغيل Backend في الخلفية
 echo "📡 تشغيل Backend API (FastAPI)..."
-cd backend
-nohup python3 -m uvicorn app.main:app --host 0.0.0.0 --port 8000 > ../backend.log 2>&1 &
+nohup python3 -m uvicorn backend.app.main:app --host 0.0.0.0 --port 8000 > backend.log 2>&1 &
 BACKEND_PID=$!
-cd ..
 
 # انتظار بدء Backend
 sleep 3
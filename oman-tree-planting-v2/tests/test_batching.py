@@ -0,0 +1,96 @@
+"""
+مجدول التجميع: توزيع النتائج وحدود الدفعة ومدرّج أحجامها، وعزل أخطاء الطلبات المجمّعة
+(عدا أخطاء الدفعة كاملة مثل امتلاء طابور المنفّذ)
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from backend.app.batching import PredictionBatcher
+from backend.app.executor import ExecutorSaturatedError, InferenceExecutor
+
+
+def _run_batch(calls):
+    async def run_batch(requests):
+        calls.append(list(requests))
+        await asyncio.sleep(0)
+        if any(request == 'bad' for request in requests):
+            raise ValueError('طلب غير صالح')
+        return [request.upper() for request in requests]
+    return run_batch
+
+
+async def _submit_all(batcher, requests):
+    return await asyncio.gather(*(batcher.submit(request) for request in requests), return_exceptions=True)
+
+
+def test_batch_results_fan_out():
+    calls = []
+    batcher = PredictionBatcher(_run_batch(calls), window_ms=5, max_batch_size=64)
+    results = asyncio.run(_submit_all(batcher, ['a', 'b', 'c']))
+    assert results == ['A', 'B', 'C']
+    assert calls == [['a', 'b', 'c']]
+
+
+def test_max_batch_size_splits_batches():
+    calls = []
+    batcher = PredictionBatcher(_run_batch(calls), window_ms=50, max_batch_size=2)
+    results = asyncio.run(_submit_all(batcher, ['a', 'b', 'c', 'd', 'e']))
+    assert results == ['A', 'B', 'C', 'D', 'E']
+    assert calls == [['a', 'b'], ['c', 'd'], ['e']]
+
+    stats = batcher.stats()
+    assert stats['batches'] == 3 and stats['items'] == 5
+    assert stats['batch_size_histogram']['<=1'] == 1
+    assert stats['batch_size_histogram']['<=2'] == 2
+
+
+def test_bad_request_fails_alone():
+    calls = []
+    batcher = PredictionBatcher(_run_batch(calls), window_ms=5, max_batch_size=64)
+    results = asyncio.run(_submit_all(batcher, ['a', 'bad', 'c']))
+    assert results[0] == 'A' and results[2] == 'C'
+    assert isinstance(results[1], ValueError)
+    # الدفعة كاملة ثم كل طلب وحده
+    assert calls[0] == ['a', 'bad', 'c']
+    assert sorted(map(tuple, calls[1:])) == [('a',), ('bad',), ('c',)]
+    assert batcher.stats()['isolated_failures'] == 1
+
+
+def test_saturated_executor_fails_whole_batch():
+    inference = InferenceExecutor(kind='thread', workers=1, queue_size=0)
+    release = threading.Event()
+    calls = []
+
+    async def run_batch(requests):
+        calls.append(list(requests))
+        return await inference.run(lambda: [request.upper() for request in requests])
+
+    async def main():
+        # العامل الوحيد مشغول والطابور بلا سعة: أي مهمة جديدة تُرفض
+        busy = asyncio.ensure_future(inference.run(release.wait))
+        await asyncio.sleep(0)
+        batcher = PredictionBatcher(run_batch, window_ms=5, max_batch_size=64)
+        try:
+            return batcher, await _submit_all(batcher, ['a', 'b', 'c'])
+        finally:
+            release.set()
+            await busy
+
+    try:
+        batcher, results = asyncio.run(main())
+    finally:
+        inference.shutdown()
+
+    assert all(isinstance(result, ExecutorSaturatedError) for result in results)
+    # لا إعادة تقييم فرادى على منفّذ ممتلئ
+    assert calls == [['a', 'b', 'c']]
+    assert batcher.stats()['isolated_failures'] == 0
+
+
+def test_single_request_error():
+    batcher = PredictionBatcher(_run_batch([]), window_ms=1)
+    with pytest.raises(ValueError):
+        asyncio.run(batcher.submit('bad'))
@@ -0,0 +1,98 @@
+"""
+ذاكرة نتائج التنبؤ: التكميم والمفاتيح والإخراج ومدة الصلاحية، ورفض المعايير غير المنتهية،
+والتكميم للمفتاح فقط (النتيجة تُحسب من القيم المدخلة كما هي)
+"""
+
+import math
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.cache import PredictionCache
+from backend.app.ml_model import TreeSuccessPredictor
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    predictor = TreeSuccessPredictor()
+    predictor.train_initial_model(parallel=False)
+    return predictor
+
+
+def test_quantize_rounds_to_resolution():
+    cache = PredictionCache()
+    assert cache.quantize({'rainfall': 120.4, 'temperature_avg': 27.3, 'soil_type': 'رملية'}) == {
+        'rainfall': 120.0, 'temperature_avg': 27.5, 'soil_type': 'رملية'
+    }
+
+
+def test_nearby_params_share_a_key():
+    cache = PredictionCache()
+    first = cache.make_key('مسقط', 'summer', 'النخيل', cache.quantize({'rainfall': 80.2, 'humidity': 55}))
+    second = cache.make_key('مسقط', 'summer', 'النخيل', cache.quantize({'humidity': 55.4, 'rainfall': 79.9}))
+    assert first == second
+
+
+@pytest.mark.parametrize('value', [math.nan, math.inf, -math.inf])
+def test_non_finite_params_are_not_cached(value):
+    cache = PredictionCache()
+    custom_params = cache.quantize({'rainfall': value, 'humidity': 40})
+    assert custom_params['humidity'] == 40.0
+    assert cache.make_key('مسقط', 'summer', 'النخيل', custom_params) is None
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_size=2)
+    for i in range(3):
+        cache.put(i, {'success_rate': i})
+    assert cache.get(0) is None
+    assert cache.get(2) == {'success_rate': 2}
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_expiry_and_invalidation(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('backend.app.cache.time.monotonic', lambda: now[0])
+    cache = PredictionCache(ttl=10)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    now[0] += 11
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+    cache.clear()
+    assert cache.get('b') is None
+    stats = cache.stats()
+    assert stats['invalidations'] == 1 and stats['hits'] == 0 and stats['misses'] == 2
+
+
+def test_cache_scores_raw_params(predictor):
+    predictor.cache.clear()
+    request = {'governorate': 'مسقط', 'season': 'summer', 'tree_name': 'النخيل'}
+    first = {'rainfall': 80.2, 'humidity': 55.0}
+    second = {'rainfall': 79.9, 'humidity': 55.4}
+    [miss] = predictor.predict_many([dict(request, custom_params=first)])
+    [hit] = predictor.predict_many([dict(request, custom_params=second)])
+    assert predictor.cache.stats()['hits'] == 1
+
+    # التقييم بالقيم المدخلة لا المُكمّاة
+    season_data = {**predictor.catalog.get_season_data('مسقط', 'summer'), **first}
+    tree = predictor.catalog.get_tree('النخيل')
+    features = np.array([predictor._build_features(season_data, 'summer', tree)])
+    [expected] = predictor._predict_success_rates(features, [(tree, season_data)])
+    assert miss['success_rate'] == round(expected, 1)
+
+    # كل طلب يرى قيمه كما أدخلها، حتى عند إصابة الذاكرة
+    assert miss['climate_data'] == season_data
+    assert hit['climate_data'] == {**season_data, **second}
+    assert hit['success_rate'] == miss['success_rate']
+
+
+@pytest.mark.parametrize('value', ['NaN', 'Infinity', '-Infinity'])
+def test_predict_rejects_non_finite_params(value):
+    from backend.app.main import app
+
+    body = '{"governorate": "مسقط", "season": "summer", "tree_name": "النخيل", "rainfall": %s}' % value
+    response = TestClient(app).post('/api/predict', content=body, headers={'content-type': 'application/json'})
+    assert response.status_code == 422
@@ -0,0 +1,54 @@
+"""
+سجل المحادثات: الحلقة لكل جلسة، ونقل الرسائل إلى SQLite بحد أقصى،
+وحفظ السجل في العملية الرئيسية عند تشغيل الاستدلال في مجمّع العمليات
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.history import ConversationStore
+
+
+def test_ring_buffer_per_session():
+    store = ConversationStore(max_turns=3)
+    for i in range(5):
+        store.append('a', f'سؤال {i}', None, f'جواب {i}')
+    store.append('b', 'سؤال', None, 'جواب')
+    assert [turn['user'] for turn in store.get('a')] == ['سؤال 2', 'سؤال 3', 'سؤال 4']
+    assert len(store.get('b')) == 1
+
+
+def test_spill_keeps_history_and_is_capped(tmp_path):
+    store = ConversationStore(max_turns=2, spill_path=str(tmp_path / 'history.db'), max_spill_turns=5)
+    for i in range(6):
+        store.append('a', f'سؤال {i}', {'season': 'summer'}, f'جواب {i}')
+    # رسالتان في الذاكرة وأربع على القرص
+    assert [turn['user'] for turn in store.get('a')] == [f'سؤال {i}' for i in range(6)]
+
+    for i in range(6, 12):
+        store.append('a', f'سؤال {i}', None, f'جواب {i}')
+    stats = store.stats()
+    assert stats['spilled_turns'] == 5
+    assert stats['spill_deleted'] == 5
+    assert [turn['user'] for turn in store.get('a')] == [f'سؤال {i}' for i in range(5, 12)]
+
+
+@pytest.mark.parametrize('pool', ['thread', 'process'])
+def test_chat_history_recorded_in_main_process(pool, monkeypatch):
+    from backend.app import main
+    from backend.app.executor import InferenceExecutor
+
+    inference = InferenceExecutor(kind=pool, workers=1, queue_size=8)
+    monkeypatch.setattr(main, 'inference', inference)
+    try:
+        client = TestClient(main.app)
+        session_id = f'test-{pool}'
+        client.post('/api/chat', json={'message': 'متى أزرع النخيل؟', 'session_id': session_id})
+        with client.stream('POST', '/api/chat/stream', json={'message': 'كم مرة أسقي؟', 'session_id': session_id}) as response:
+            response.read()
+        history = client.get(f'/api/chat/history/{session_id}').json()
+    finally:
+        inference.shutdown()
+
+    assert history['count'] == 2
+    assert [turn['user'] for turn in history['data']] == ['متى أزرع النخيل؟', 'كم مرة أسقي؟']
@@ -0,0 +1,61 @@
+"""
+حفظ النموذج وتحميله مع مصفوفات المحرك المُجمّع، ورفض الحفظ بدون نموذج محمّل
+"""
+
+import pytest
+
+from backend.app import config
+from backend.app.ml_model import TreeSuccessPredictor
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    predictor = TreeSuccessPredictor()
+    predictor.train_initial_model(parallel=False)
+    return predictor
+
+
+def test_save_and_load_compiled_engine(predictor, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'INFERENCE_ENGINE', 'compiled')
+    predictor.save_model(tmp_path)
+    assert (tmp_path / 'engine' / 'meta.json').exists()
+
+    loaded = TreeSuccessPredictor()
+    assert loaded.load_model(tmp_path)
+    assert loaded.engine is not None and loaded.engine.is_mapped
+    assert loaded.rf_model is None
+
+
+def test_save_without_engine_removes_stale_engine(predictor, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'INFERENCE_ENGINE', 'compiled')
+    predictor.save_model(tmp_path)
+
+    # المحرك لا يطابق sklearn: تُحفظ النماذج دون محرك ويُحذف المحرك القديم
+    monkeypatch.setattr(predictor, '_compile_engine', lambda: None)
+    predictor.save_model(tmp_path)
+    assert not (tmp_path / 'engine').exists()
+
+    loaded = TreeSuccessPredictor()
+    assert loaded.load_model(tmp_path)
+    assert loaded.rf_model is not None
+
+
+def test_save_without_model_is_refused(tmp_path):
+    assert not TreeSuccessPredictor().save_model(tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_engine_only_save_keeps_engine(predictor, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'INFERENCE_ENGINE', 'compiled')
+    predictor.save_model(tmp_path)
+    loaded = TreeSuccessPredictor()
+    assert loaded.load_model(tmp_path) and loaded.rf_model is None
+
+    # لا نماذج sklearn في الذاكرة: يُعاد حفظ المحرك المحمّل وتبقى ملفات pkl
+    assert loaded.save_model(tmp_path)
+    assert (tmp_path / 'engine' / 'meta.json').exists()
+    assert (tmp_path / 'rf_model.pkl').exists()
+
+    reloaded = TreeSuccessPredictor()
+    assert reloaded.load_model(tmp_path)
+    assert reloaded.engine is not None and reloaded.engine.is_mapped
@@ -0,0 +1,159 @@
+"""
+إعادة التحميل الساخن: النسخة الجديدة تُبنى كاملة ثم تُستبدل دفعة واحدة،
+وعند فشل البناء تستمر النسخة الحالية
+عند تغيّر عدد الأشجار تُبنى النسخة الجديدة قبل استبدال الفهرس المشترك، فيجب أن تعتمد على فهرسها فقط
+واستبدال مجمّع الاستدلال من خيط إعادة التحميل لا يُفشل المهام المرسلة في نفس اللحظة
+"""
+
+import asyncio
+import copy
+import json
+import shutil
+import threading
+
+import pytest
+
+from backend.app import config, data
+from backend.app.catalog import get_catalog
+from backend.app.executor import InferenceExecutor
+from backend.app.ml_model import TreeSuccessPredictor
+from backend.app.reloader import HotReloader
+
+
+@pytest.fixture(scope='module')
+def model_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp('models')
+    predictor = TreeSuccessPredictor()
+    predictor.train_initial_model(parallel=False)
+    predictor.save_model(path)
+    return path
+
+
+@pytest.fixture
+def main(model_dir, tmp_path, monkeypatch):
+    """الخادم مع نسخة من ملفات البيانات في مجلد مؤقت (تُستعاد النسخة الأصلية بعد الاختبار)"""
+    from backend.app import main
+
+    for filename in (data.TREES_FILE, data.CLIMATE_FILE):
+        shutil.copy(data.DATA_DIR / filename, tmp_path / filename)
+    monkeypatch.setattr(data, 'DATA_DIR', tmp_path)
+    monkeypatch.setattr(config, 'MODEL_DIR', model_dir)
+    assert main.reloader.reload()
+    yield main
+    monkeypatch.undo()
+    monkeypatch.setattr(config, 'MODEL_DIR', model_dir)
+    assert main.reloader.reload()
+
+
+def _write_trees(trees):
+    trees_db = json.loads((data.DATA_DIR / data.TREES_FILE).read_text(encoding='utf-8'))
+    trees_db['trees'] = trees
+    trees_db['total_trees'] = len(trees)
+    (data.DATA_DIR / data.TREES_FILE).write_text(json.dumps(trees_db, ensure_ascii=False), encoding='utf-8')
+
+
+def _assert_recommendations_consistent(main):
+    """كل توصية تخص شجرة من الفهرس الحالي، ودرجة توافقها هي درجة تلك الشجرة"""
+    catalog = main.predictor.catalog
+    assert get_catalog() is catalog
+    for gov in catalog.get_governorate_names():
+        for season in ('winter', 'summer'):
+            recommendations = main.predictor.recommend_trees(gov, season, limit=len(catalog.dataset.trees))
+            compatibility = main.predictor.recommender.compatibility(catalog.get_season_data(gov, season))
+            names = [tree['name'] for tree in catalog.dataset.trees]
+            assert len(recommendations) == len(names)
+            for entry in recommendations:
+                index = names.index(entry['tree']['name'])
+                assert entry['compatibility'] == float(compatibility[index])
+                assert entry['success_rate'] == main.predictor.predict_success(gov, season, entry['tree']['name'])['success_rate']
+
+
+def test_reloader_swaps_and_counts_versions():
+    swapped = []
+    builds = iter(['v1', 'v2'])
+    reloader = HotReloader(lambda: next(builds), swapped.append)
+
+    assert reloader.reload() and reloader.reload()
+    assert swapped == ['v1', 'v2']
+    assert reloader.version == 2
+
+
+def test_reloader_failure_keeps_current():
+    swapped = []
+
+    def build():
+        raise ValueError('ملف تالف')
+
+    reloader = HotReloader(build, swapped.append)
+    assert not reloader.reload()
+    assert swapped == []
+    assert reloader.version == 0
+    assert reloader.failures == 1 and reloader.last_error == 'ملف تالف'
+
+
+def test_server_reload_replaces_services(main):
+    old_predictor, old_tables = main.predictor, main.tables
+    version = main.reloader.version
+
+    assert main.reloader.reload(), main.reloader.last_error
+    assert main.reloader.version == version + 1
+    assert main.predictor is not old_predictor and main.predictor.is_ready
+    assert main.tables is not old_tables and main.tables.chatbot is main.chatbot
+
+
+def test_server_reload_failure_keeps_serving(main):
+    predictor, tables = main.predictor, main.tables
+    (data.DATA_DIR / data.TREES_FILE).write_text('{', encoding='utf-8')
+
+    assert not main.reloader.reload()
+    assert main.reloader.last_error
+    assert main.predictor is predictor and main.tables is tables
+
+
+def test_reload_with_added_trees(main):
+    trees = json.loads(json.dumps(main.predictor.catalog.dataset.trees_db['trees']))
+    added = []
+    for i, tree in enumerate(trees[:3]):
+        extra = copy.deepcopy(tree)
+        extra['name'] = f"{tree['name']} {i}"
+        extra['name_en'] = f"{tree['name_en']} {i}"
+        extra['requirements']['rainfall_min'] += 10 * (i + 1)
+        added.append(extra)
+    _write_trees(trees + added)
+
+    assert main.reloader.reload(), main.reloader.last_error
+    assert len(main.predictor.catalog.dataset.trees) == len(trees) + 3
+    _assert_recommendations_consistent(main)
+
+
+def test_reload_with_removed_trees(main):
+    trees = json.loads(json.dumps(main.predictor.catalog.dataset.trees_db['trees']))
+    _write_trees(trees[3:])
+
+    assert main.reloader.reload(), main.reloader.last_error
+    assert len(main.predictor.catalog.dataset.trees) == len(trees) - 3
+    _assert_recommendations_consistent(main)
+
+
+def test_executor_restart_between_get_and_submit(monkeypatch):
+    inference = InferenceExecutor(kind='thread', workers=1, queue_size=8)
+    get_pool = inference._get_pool
+    restarts = []
+
+    def get_pool_then_restart():
+        pool = get_pool()
+        # إعادة تحميل من خيط آخر في أسوأ لحظة: بعد الحصول على المجمّع وقبل الإرسال إليه
+        thread = threading.Thread(target=inference.restart)
+        thread.start()
+        thread.join(timeout=0.2)
+        restarts.append(thread)
+        return pool
+
+    monkeypatch.setattr(inference, '_get_pool', get_pool_then_restart)
+    try:
+        # بدون القفل: RuntimeError('cannot schedule new futures after shutdown')
+        assert asyncio.run(inference.run(abs, -3)) == 3
+    finally:
+        for thread in restarts:
+            thread.join()
+        inference.shutdown()
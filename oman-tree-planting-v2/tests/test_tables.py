@@ -0,0 +1,89 @@
+"""
+جداول الاستجابات المحسوبة مسبقاً: مطابقة المسار الديناميكي، وإعادة البناء
+عند التغيير في الخلفية فقط (القراءات تعيد آخر نسخة مكتملة)
+"""
+
+import copy
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app.chatbot import OmanTreeChatbot
+from backend.app.ml_model import TreeSuccessPredictor
+from backend.app.tables import ResponseTables, dumps
+
+
+def _as_response(value):
+    """القيمة كما يعيدها المسار الديناميكي بعد تسلسل JSON"""
+    return json.loads(dumps(value))
+
+
+@pytest.fixture(scope='module')
+def chatbot():
+    return OmanTreeChatbot()
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    predictor = TreeSuccessPredictor()
+    predictor.train_initial_model()
+    return predictor
+
+
+def test_static_tables_match_chatbot(chatbot):
+    tables = ResponseTables(chatbot, SimpleNamespace(is_ready=False, atlas={}))
+    assert tables.refresh(wait=True)
+
+    governorate = chatbot.catalog.get_governorate_names()[0]
+    body = json.loads(tables.seasonal_advice(governorate, 'الصيف'))
+    assert body['data'] == {
+        'governorate': governorate,
+        'season': 'الصيف',
+        'advice': chatbot.get_seasonal_advice(governorate, 'الصيف')
+    }
+
+    body = json.loads(tables.recommendations(governorate, 'الصيف', 3))
+    assert body['data'] == _as_response(chatbot.get_tree_recommendation(governorate, 'الصيف', 3))
+
+    # النموذج غير جاهز واسم غير معروف: المسار الديناميكي
+    assert tables.recommendations(governorate, 'الصيف', 3, rank_by='ml') is None
+    assert tables.seasonal_advice('غير معروفة', 'الصيف') is None
+
+
+def test_ml_table_matches_predictor(chatbot, predictor):
+    tables = ResponseTables(chatbot, predictor)
+    tables.refresh(wait=True)
+
+    governorate = chatbot.catalog.get_governorate_names()[0]
+    body = json.loads(tables.recommendations(governorate, 'الصيف', 5, rank_by='ml'))
+    assert body['data'] == _as_response(predictor.recommend_trees(governorate, 'summer', 5))
+
+    tree = chatbot.catalog.dataset.trees[0]
+    payload = tables.prediction(governorate, 'summer', tree['name_en'])
+    assert json.loads(payload.body) == _as_response(
+        {'success': True, 'data': predictor.atlas[(governorate, 'summer', tree['name'])]}
+    )
+    assert tables.prediction(governorate, 'summer', 'غير معروفة') is None
+
+
+def test_getters_never_rebuild(chatbot):
+    tables = ResponseTables(chatbot, SimpleNamespace(is_ready=False, atlas={}))
+    tables.refresh(wait=True)
+    builds = tables.builds
+    assert not tables.refresh(wait=True)
+    assert tables.builds == builds
+
+    original = chatbot.catalog
+    chatbot.catalog = copy.copy(original)
+    try:
+        governorate = original.get_governorate_names()[0]
+        # الفهرس تغيّر: القراءة تعيد النسخة الحالية دون بناء
+        assert tables.seasonal_advice(governorate, 'الصيف') is not None
+        assert tables.recommendations(governorate, 'الصيف', 3) is not None
+        assert tables.builds == builds
+
+        assert tables.refresh(wait=True)
+        assert tables.builds == builds + 1
+    finally:
+        chatbot.catalog = original
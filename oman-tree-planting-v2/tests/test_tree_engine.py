@@ -0,0 +1,84 @@
+"""
+مطابقة المحرك المُجمّع لمخرجات sklearn
+على شبكة التدريب وعلى مدخلات عشوائية ومقرّبة وعلى عتبات الأشجار نفسها
+"""
+
+import numpy as np
+import pytest
+
+from backend.app.ml_model import CATEGORICAL_FEATURES, TreeSuccessPredictor
+from backend.app.tree_engine import CompiledEnsemble
+
+# فرق التقريب المسموح (ترتيب جمع قيم الأوراق فقط)
+TOLERANCE = 1e-9
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    predictor = TreeSuccessPredictor()
+    predictor.train_initial_model(parallel=False)
+    return predictor
+
+
+@pytest.fixture(scope='module')
+def engine(predictor):
+    return CompiledEnsemble.from_sklearn(predictor.rf_model, predictor.gb_model, predictor.scaler)
+
+
+def _random_inputs(predictor, count, seed):
+    X_grid, _ = predictor._generate_training_data()
+    rng = np.random.default_rng(seed)
+    low, high = X_grid.min(axis=0), X_grid.max(axis=0)
+    X = rng.uniform(low - (high - low) * 0.2, high + (high - low) * 0.2, size=(count, X_grid.shape[1]))
+    X[:, CATEGORICAL_FEATURES] = np.round(X[:, CATEGORICAL_FEATURES])
+    return X
+
+
+def _threshold_inputs(predictor, count, seed):
+    """صفوف عشوائية تُوضع فيها خاصية واحدة على عتبة شجرة (بعد عكس التطبيع)"""
+    rng = np.random.default_rng(seed)
+    X = _random_inputs(predictor, count, seed)
+    trees = [e.tree_ for e in predictor.rf_model.estimators_] + [e.tree_ for e in predictor.gb_model.estimators_[:, 0]]
+    splits = [(f, t) for tree in trees for f, t in zip(tree.feature, tree.threshold) if f >= 0]
+    scaler = predictor.scaler
+    for row, index in enumerate(rng.integers(len(splits), size=count)):
+        feature, threshold = splits[index]
+        X[row, feature] = threshold * scaler.scale_[feature] + scaler.mean_[feature]
+    return X
+
+
+def _assert_matches(predictor, engine, X):
+    X_scaled = predictor.scaler.transform(X)
+    rf_prob, gb_prob = engine.predict_proba(X)
+    np.testing.assert_allclose(rf_prob, predictor.rf_model.predict_proba(X_scaled)[:, 1], rtol=0, atol=TOLERANCE)
+    np.testing.assert_allclose(gb_prob, predictor.gb_model.predict_proba(X_scaled)[:, 1], rtol=0, atol=TOLERANCE)
+
+
+def test_matches_sklearn_on_training_grid(predictor, engine):
+    X, _ = predictor._generate_training_data()
+    _assert_matches(predictor, engine, X)
+
+
+def test_matches_sklearn_on_random_inputs(predictor, engine):
+    _assert_matches(predictor, engine, _random_inputs(predictor, 5000, seed=1))
+
+
+def test_matches_sklearn_on_quantized_inputs(predictor, engine):
+    # معايير الواجهة المخصصة: مطر بالملم وحرارة بنصف درجة
+    X = _random_inputs(predictor, 5000, seed=2)
+    X[:, :3] = np.round(X[:, :3] * 2) / 2
+    X[:, [4, 5]] = np.round(X[:, [4, 5]], 1)
+    _assert_matches(predictor, engine, X)
+
+
+def test_matches_sklearn_on_split_thresholds(predictor, engine):
+    _assert_matches(predictor, engine, _threshold_inputs(predictor, 5000, seed=3))
+
+
+def test_saved_engine_matches(predictor, engine, tmp_path):
+    engine.save(tmp_path / 'engine')
+    loaded = CompiledEnsemble.load(tmp_path / 'engine', mmap_mode='r')
+    assert loaded.is_mapped
+    X = _threshold_inputs(predictor, 1000, seed=4)
+    for expected, actual in zip(engine.predict_proba(X), loaded.predict_proba(X)):
+        np.testing.assert_array_equal(expected, actual)